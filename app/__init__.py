@@ -1,20 +1,28 @@
 import os
+import threading
 
 from flask import Flask, jsonify
+from flask_compress import Compress
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+
+from app.config import config as config_dict
+from app.json_provider import OrjsonProvider
+from app.pangolin_api import PangolinAPI
+from app.routes import main
 
 
 def create_app(config=None):
     """Application factory pattern with proper configuration management."""
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
 
     # Configuration
-    from app.config import config as config_dict
-
     env = os.getenv("FLASK_ENV", "production")
+    config_class = config_dict.get(env, config_dict["default"])
 
-    app.config.from_object(config_dict[env])
-    app.config.from_object(config_dict["default"])
+    # Every config class extends Config, so the env class alone is complete
+    app.config.from_object(config_class)
 
     if config:
         # Handle both config objects and dictionaries
@@ -31,13 +39,20 @@ def create_app(config=None):
 
     # Initialize extensions
     CORS(app)  # Enable CORS for API endpoints
+    Compress(app)  # gzip/br for large JSON responses
+
+    # Shared Pangolin API client so requests reuse one pooled session
+    pangolin = PangolinAPI(app.config)
+    app.extensions["pangolin"] = pangolin
+
+    # Prime the pool in the background; startup never waits on Pangolin
+    if not app.testing:
+        threading.Thread(target=pangolin.warm_up, daemon=True).start()
 
     # Initialize configuration
-    config_dict[env].init_app(app)
+    config_class.init_app(app)
 
     # Register blueprints
-    from app.routes import main
-
     app.register_blueprint(main)
 
     # Error handlers
@@ -47,12 +62,15 @@ def create_app(config=None):
 
     @app.errorhandler(500)
     def internal_error(error):
-        app.logger.error(f"Server Error: {error}")
+        app.logger.error("Server Error: %s", error)
         return jsonify({"error": "Internal server error"}), 500
 
     @app.errorhandler(Exception)
     def handle_exception(e):
-        app.logger.error(f"Unhandled exception: {e}")
+        # Keep client errors such as 413 (MAX_CONTENT_LENGTH) as they are
+        if isinstance(e, HTTPException):
+            return jsonify({"error": e.name}), e.code
+        app.logger.error("Unhandled exception: %s", e)
         return jsonify({"error": "An unexpected error occurred"}), 500
 
     return app
@@ -1,5 +1,9 @@
 import os
 
+# Production log handlers are attached to the shared "app" logger, so only
+# install them once per process; the listener writes records off-thread
+_log_listener = None
+
 
 class Config:
     """Base configuration class."""
@@ -14,6 +18,17 @@ class Config:
     PANGOLIN_API_URL = os.getenv("PANGOLIN_API_URL", "")
     PANGOLIN_API_KEY = os.getenv("PANGOLIN_API_KEY", "")
     PANGOLIN_ORG_ID = os.getenv("PANGOLIN_ORG_ID", "")
+    # Seconds a fetched rule list is reused before hitting the API again
+    PANGOLIN_RULES_CACHE_TTL = float(os.getenv("PANGOLIN_RULES_CACHE_TTL", "2"))
+    # Seconds the organization's resource list is reused
+    PANGOLIN_RESOURCES_CACHE_TTL = float(
+        os.getenv("PANGOLIN_RESOURCES_CACHE_TTL", "15")
+    )
+    # Connection pool sizing for the shared HTTP session
+    PANGOLIN_POOL_CONNECTIONS = int(os.getenv("PANGOLIN_POOL_CONNECTIONS", "20"))
+    PANGOLIN_POOL_MAXSIZE = int(os.getenv("PANGOLIN_POOL_MAXSIZE", "50"))
+    # Concurrent DELETE requests when clearing a resource's IP rules
+    PANGOLIN_DELETE_WORKERS = int(os.getenv("PANGOLIN_DELETE_WORKERS", "8"))
 
     # Application settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -21,6 +36,12 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "Lax"
 
+    # Response compression (Flask-Compress): JSON payloads only, and only
+    # when large enough to be worth the CPU
+    COMPRESS_MIMETYPES = ["application/json"]
+    COMPRESS_LEVEL = 4
+    COMPRESS_MIN_SIZE = 1024
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -74,24 +95,39 @@ class ProductionConfig(Config):
         Config.init_app(app)
 
         # Production-specific logging
+        import atexit
         import logging
-        from logging.handlers import RotatingFileHandler
-
-        if not app.debug and not app.testing:
-            if not os.path.exists("logs"):
-                os.mkdir("logs")
-            file_handler = RotatingFileHandler(
+        import queue
+        from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+        global _log_listener
+        if _log_listener is not None or app.debug or app.testing:
+            return
+
+        if os.getenv("LOG_TO_STDOUT"):
+            handler = logging.StreamHandler()
+        else:
+            os.makedirs("logs", exist_ok=True)
+            handler = RotatingFileHandler(
                 "logs/pg_ip_whitelister.log", maxBytes=10240000, backupCount=10
             )
-            file_handler.setFormatter(
-                logging.Formatter(
-                    "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
-                )
+        handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
             )
-            file_handler.setLevel(logging.INFO)
-            app.logger.addHandler(file_handler)
-            app.logger.setLevel(logging.INFO)
-            app.logger.info("PG IP Whitelister startup")
+        )
+        handler.setLevel(logging.INFO)
+
+        # Request threads only enqueue records; disk/stream writes happen on
+        # the listener thread
+        log_queue = queue.SimpleQueue()
+        _log_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+
+        app.logger.addHandler(QueueHandler(log_queue))
+        app.logger.setLevel(logging.INFO)
+        app.logger.info("PG IP Whitelister startup")
 
 
 config = {
@@ -1,18 +1,29 @@
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
+import orjson
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.utils import validate_ip_address
 
 logger = logging.getLogger(__name__)
 
+# Default upper bound on concurrent DELETE requests issued by bulk rule removal
+MAX_DELETE_WORKERS = 8
+
 
 class PangolinAPIError(Exception):
     """Custom exception for Pangolin API errors."""
 
+    __slots__ = ("status_code",)
+
     def __init__(self, message, status_code=None):
         super().__init__(message)
         self.status_code = status_code
@@ -21,6 +32,24 @@ class PangolinAPIError(Exception):
 class PangolinAPI:
     """Client for interacting with the Pangolin API."""
 
+    __slots__ = (
+        "base_url",
+        "_url_prefix",
+        "api_key",
+        "org_id",
+        "rules_ttl",
+        "_rules_cache",
+        "resources_ttl",
+        "_resources_cache",
+        "_resources_generation",
+        "_rules_generation",
+        "_cache_lock",
+        "_configured",
+        "headers",
+        "session",
+        "max_delete_workers",
+    )
+
     def __init__(self, config=None):
         """
         Initialize Pangolin API client.
@@ -30,7 +59,7 @@ class PangolinAPI:
         """
         if config is None and current_app:
             config = current_app.config
-        logger.debug(f"Pangolin API config at time of instantiation: {config}")
+        logger.debug("Pangolin API config at time of instantiation: %s", config)
 
         # Fallback to environment variables if no config provided
         if config is None:
@@ -39,17 +68,37 @@ class PangolinAPI:
                 "PANGOLIN_API_KEY": os.getenv("PANGOLIN_API_KEY", ""),
                 "PANGOLIN_ORG_ID": os.getenv("PANGOLIN_ORG_ID", ""),
             }
-        logger.debug(f"Pangolin API config after instantiation: {config}")
+        logger.debug("Pangolin API config after instantiation: %s", config)
 
-        self.base_url = config.get("PANGOLIN_API_URL", "")
+        self.base_url = config.get("PANGOLIN_API_URL", "").rstrip("/")
+        self._url_prefix = f"{self.base_url}/"
         self.api_key = config.get("PANGOLIN_API_KEY", "")
         self.org_id = config.get("PANGOLIN_ORG_ID", "")
+        self.rules_ttl = float(config.get("PANGOLIN_RULES_CACHE_TTL", 2.0))
+        self.resources_ttl = float(config.get("PANGOLIN_RESOURCES_CACHE_TTL", 15.0))
+
+        # (fetched_at, resources); see get_resources()
+        self._resources_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+
+        # resource_id -> (fetched_at, rules, whitelisted IPs); see get_resource_rules()
+        self._rules_cache: Dict[
+            int, Tuple[float, List[Dict[str, Any]], FrozenSet[str]]
+        ] = {}
+
+        # Bumped by invalidate_rules_cache; a fetch that started before a write
+        # sees a newer generation when it finishes and does not store its result
+        self._resources_generation = 0
+        self._rules_generation: Dict[int, int] = {}
+        self._cache_lock = threading.Lock()
 
         # Validate required configuration
+        if not self.base_url:
+            logger.warning("Pangolin API URL not configured")
         if not self.api_key:
             logger.warning("Pangolin API key not configured")
         if not self.org_id:
             logger.warning("Pangolin organization ID not configured")
+        self._configured = bool(self.base_url and self.api_key and self.org_id)
 
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -61,6 +110,43 @@ class PangolinAPI:
         self.session = requests.Session()
         self.session.headers.update(self.headers)
 
+        # Only idempotent calls are retried; a retried PUT could create a
+        # duplicate rule
+        retry = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "DELETE"]),
+            raise_on_status=False,
+        )
+        pool_maxsize = int(config.get("PANGOLIN_POOL_MAXSIZE", 50))
+        adapter = HTTPAdapter(
+            pool_connections=int(config.get("PANGOLIN_POOL_CONNECTIONS", 20)),
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Never run more concurrent deletes than the pool can keep connections for
+        self.max_delete_workers = max(
+            1,
+            min(
+                int(config.get("PANGOLIN_DELETE_WORKERS", MAX_DELETE_WORKERS)),
+                pool_maxsize,
+            ),
+        )
+
+    def warm_up(self) -> None:
+        """Open a pooled connection to the API ahead of the first real request."""
+        if not self._configured:
+            return
+        try:
+            self.session.head(self.base_url, timeout=5)
+            logger.debug("Warmed up connection to %s", self.base_url)
+        except requests.exceptions.RequestException as e:
+            logger.debug("Connection warm-up to %s failed: %s", self.base_url, e)
+
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """
         Make HTTP request to Pangolin API with error handling.
@@ -76,26 +162,46 @@ class PangolinAPI:
         Raises:
             PangolinAPIError: If API request fails
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        if not self._configured:
+            raise PangolinAPIError("Pangolin API not configured", status_code=503)
+
+        url = self._url_prefix + endpoint.lstrip("/")
         response = None
 
         try:
             response = self.session.request(method, url, timeout=10, **kwargs)
-            response.raise_for_status()
+            if response.status_code >= 400:
+                # Pangolin error bodies are usually JSON; keep their message
+                try:
+                    payload = orjson.loads(response.content)
+                except ValueError:
+                    payload = None
+                message = (
+                    payload.get("message") if isinstance(payload, dict) else None
+                ) or f"HTTP {response.status_code}"
+                logger.error(
+                    "API request failed with status %s: %s",
+                    response.status_code,
+                    message,
+                )
+                raise PangolinAPIError(
+                    f"API request failed: {message}",
+                    status_code=response.status_code,
+                )
 
-            result = response.json()
+            result = orjson.loads(response.content)
             return result
 
         except requests.exceptions.RequestException as e:
             status_code = e.response.status_code if e.response is not None else None
-            logger.error(f"API request failed with status {status_code}: {e}")
+            logger.error("API request failed with status %s: %s", status_code, e)
             raise PangolinAPIError(f"API request failed: {e}", status_code=status_code)
         except ValueError as e:
-            logger.error(f"Invalid JSON response: {e}")
-            if response:
-                logger.error(f"Response content: {response.text}")
-            else:
+            logger.error("Invalid JSON response: %s", e)
+            if response is None:
                 logger.error("No response object available")
+            elif logger.isEnabledFor(logging.ERROR):
+                logger.error("Response content: %s", response.text)
             raise PangolinAPIError(f"Invalid JSON response: {e}", status_code=500)
 
     def get_resources(self) -> Optional[List[Dict[str, Any]]]:
@@ -106,23 +212,65 @@ class PangolinAPI:
             List of resource dictionaries or None if failed
         """
         try:
+            cached = self._resources_cache
+            if cached is not None and time.monotonic() - cached[0] < self.resources_ttl:
+                logger.debug("Using cached resources")
+                return cached[1]
+
+            with self._cache_lock:
+                generation = self._resources_generation
+
             result = self._make_request("GET", f"org/{self.org_id}/resources")
 
             if result.get("success", False) and "data" in result:
                 resources = result["data"].get("resources", [])
-                logger.info(f"Retrieved {len(resources)} resources")
+                logger.info("Retrieved %s resources", len(resources))
+                with self._cache_lock:
+                    if generation == self._resources_generation:
+                        self._resources_cache = (time.monotonic(), resources)
                 return resources
             else:
-                logger.error(f"API returned unsuccessful response: {result}")
+                logger.error("API returned unsuccessful response: %s", result)
                 return None
 
         except PangolinAPIError as e:
-            logger.error(f"Failed to fetch resources: {e}")
+            logger.error("Failed to fetch resources: %s", e)
             return None
 
     def get_resource_rules(self, resource_id: int) -> Optional[List[Dict[str, Any]]]:
         """
-        Get rules for a specific resource.
+        Get rules for a specific resource, served from a short-lived cache.
+
+        Only read endpoints should use this; write paths call _fetch_rules so
+        they never act on rules another worker has changed since.
+
+        Args:
+            resource_id: ID of the resource
+
+        Returns:
+            List of rule dictionaries or None if failed
+        """
+        if isinstance(resource_id, int):
+            cached = self._rules_cache.get(resource_id)
+            if cached is not None and time.monotonic() - cached[0] < self.rules_ttl:
+                logger.debug("Using cached rules for resource %s", resource_id)
+                return cached[1]
+
+        with self._cache_lock:
+            generation = self._rules_generation.get(resource_id, 0)
+
+        rules = self._fetch_rules(resource_id)
+        if rules is not None:
+            entry = (time.monotonic(), rules, self._whitelisted_ips(rules))
+            with self._cache_lock:
+                # A write invalidated the cache while this fetch was in flight
+                if generation == self._rules_generation.get(resource_id, 0):
+                    self._rules_cache[resource_id] = entry
+        return rules
+
+    def _fetch_rules(self, resource_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch the current rules for a resource from the API, bypassing the cache.
 
         Args:
             resource_id: ID of the resource
@@ -138,18 +286,97 @@ class PangolinAPI:
 
             if result.get("success", False) and "data" in result:
                 rules = result["data"].get("rules", [])
-                logger.info(f"Retrieved {len(rules)} rules for resource {resource_id}")
+                logger.info(
+                    "Retrieved %s rules for resource %s", len(rules), resource_id
+                )
                 return rules
             else:
                 logger.error(
-                    f"API returned unsuccessful response for resource {resource_id}: {result}"
+                    "API returned unsuccessful response for resource %s: %s",
+                    resource_id,
+                    result,
                 )
                 return None
 
         except (PangolinAPIError, ValueError) as e:
-            logger.error(f"Failed to fetch rules for resource {resource_id}: {e}")
+            logger.error("Failed to fetch rules for resource %s: %s", resource_id, e)
             return None
 
+    def invalidate_rules_cache(self, resource_id: int) -> None:
+        """
+        Drop cached data for a resource after its rules have changed.
+
+        The resource listing is dropped too, since it reports whitelist state.
+        Fetches already in flight will not store their now-stale results.
+
+        Args:
+            resource_id: ID of the resource
+        """
+        with self._cache_lock:
+            self._rules_generation[resource_id] = (
+                self._rules_generation.get(resource_id, 0) + 1
+            )
+            self._rules_cache.pop(resource_id, None)
+            self._resources_generation += 1
+            self._resources_cache = None
+
+    @staticmethod
+    def _whitelisted_ips(rules: List[Dict[str, Any]]) -> FrozenSet[str]:
+        """
+        Collect the IPs allowed by enabled IP whitelist rules.
+
+        Args:
+            rules: Rules of a resource
+
+        Returns:
+            Frozen set of whitelisted IP address strings
+        """
+        return frozenset(
+            rule["value"]
+            for rule in rules
+            if rule.get("match") == "IP"
+            and rule.get("action") == "ACCEPT"
+            and rule.get("enabled", True)
+            and "value" in rule
+        )
+
+    @staticmethod
+    def _analyze_rules(rules: List[Dict[str, Any]], ip: str) -> Tuple[bool, int]:
+        """
+        Scan rules once for an existing whitelist entry and the next priority.
+
+        Args:
+            rules: Rules of a resource
+            ip: IP address to look for
+
+        Returns:
+            Tuple of (IP is whitelisted, next available priority number)
+        """
+        highest_priority = 0
+        found = False
+        for rule in rules:
+            priority = rule.get("priority") or 0
+            if priority > highest_priority:
+                highest_priority = priority
+            if (
+                not found
+                and rule.get("match") == "IP"
+                and rule.get("action") == "ACCEPT"
+                and rule.get("value") == ip
+                and rule.get("enabled", True)
+            ):
+                found = True
+        return found, highest_priority + 1
+
+    def _not_configured_result(self) -> Dict[str, Any]:
+        """Result returned by write operations when credentials are missing."""
+        logger.error("Pangolin API not configured; skipping request")
+        return {
+            "success": False,
+            "message": "Pangolin API not configured",
+            "error": "NOT_CONFIGURED",
+        }
+
     def check_ip_whitelisted(self, resource_id: int, ip: str) -> bool:
         """
         Check if the given IP is already whitelisted for the resource.
@@ -163,31 +390,35 @@ class PangolinAPI:
         """
         try:
             if not validate_ip_address(ip):
-                logger.warning(f"Invalid IP address provided: {ip}")
+                logger.warning("Invalid IP address provided: %s", ip)
                 return False
 
             rules = self.get_resource_rules(resource_id)
             if rules is None:
                 return False
 
-            for rule in rules:
-                if (
-                    rule.get("match") == "IP"
-                    and rule.get("action") == "ACCEPT"
-                    and rule.get("value") == ip
-                    and rule.get("enabled", True)
-                ):
-                    logger.info(
-                        f"IP {ip} is already whitelisted for resource {resource_id}"
-                    )
-                    return True
+            # Reuse the set built when these rules were cached
+            cached = self._rules_cache.get(resource_id)
+            if cached is not None and cached[1] is rules:
+                whitelisted_ips = cached[2]
+            else:
+                whitelisted_ips = self._whitelisted_ips(rules)
+
+            if ip in whitelisted_ips:
+                logger.info(
+                    "IP %s is already whitelisted for resource %s", ip, resource_id
+                )
+                return True
 
-            logger.info(f"IP {ip} is not whitelisted for resource {resource_id}")
+            logger.info("IP %s is not whitelisted for resource %s", ip, resource_id)
             return False
 
         except Exception as e:
             logger.error(
-                f"Error checking whitelist status for IP {ip} on resource {resource_id}: {e}"
+                "Error checking whitelist status for IP %s on resource %s: %s",
+                ip,
+                resource_id,
+                e,
             )
             return False
 
@@ -201,25 +432,12 @@ class PangolinAPI:
         Returns:
             Next available priority number
         """
-        try:
-            rules = self.get_resource_rules(resource_id)
-            if not rules:
-                return 1  # Start with priority 1 if no rules exist
-
-            # Find the highest priority and add 1
-            highest_priority = max(
-                (rule.get("priority", 0) for rule in rules), default=0
-            )
-            next_priority = highest_priority + 1
-
-            logger.debug(f"Next priority for resource {resource_id}: {next_priority}")
-            return next_priority
-
-        except Exception as e:
-            logger.error(
-                f"Error calculating next priority for resource {resource_id}: {e}"
-            )
-            return 1  # Fallback to priority 1
+        # Priorities feed a write, so read fresh rules rather than the cache;
+        # with no rules (or a failed fetch) this starts at priority 1
+        rules = self._fetch_rules(resource_id) or []
+        _, next_priority = self._analyze_rules(rules, "")
+        logger.debug("Next priority for resource %s: %s", resource_id, next_priority)
+        return next_priority
 
     def delete_rule(self, resource_id: int, rule_id: int) -> Dict[str, Any]:
         """
@@ -232,6 +450,9 @@ class PangolinAPI:
         Returns:
             Dictionary containing operation result
         """
+        if not self._configured:
+            return self._not_configured_result()
+
         try:
             # Input validation
             if not isinstance(resource_id, int) or resource_id <= 0:
@@ -248,15 +469,20 @@ class PangolinAPI:
                     "error": "INVALID_RULE_ID",
                 }
 
-            logger.info(f"Deleting rule {rule_id} from resource {resource_id}")
+            logger.info("Deleting rule %s from resource %s", rule_id, resource_id)
 
-            result = self._make_request(
-                "DELETE", f"resource/{resource_id}/rule/{rule_id}"
-            )
+            try:
+                result = self._make_request(
+                    "DELETE", f"resource/{resource_id}/rule/{rule_id}"
+                )
+            finally:
+                self.invalidate_rules_cache(resource_id)
 
             if result.get("success", False):
                 logger.info(
-                    f"Successfully deleted rule {rule_id} from resource {resource_id}"
+                    "Successfully deleted rule %s from resource %s",
+                    rule_id,
+                    resource_id,
                 )
                 return {
                     "success": True,
@@ -265,7 +491,10 @@ class PangolinAPI:
             else:
                 error_msg = result.get("message", "Failed to delete rule")
                 logger.error(
-                    f"Failed to delete rule {rule_id} from resource {resource_id}: {error_msg}"
+                    "Failed to delete rule %s from resource %s: %s",
+                    rule_id,
+                    resource_id,
+                    error_msg,
                 )
                 return {
                     "success": False,
@@ -276,12 +505,17 @@ class PangolinAPI:
         except PangolinAPIError as e:
             if e.status_code == 404:
                 logger.warning(
-                    f"Rule {rule_id} not found for resource {resource_id} during deletion. Assuming already deleted."
+                    "Rule %s not found for resource %s during deletion. Assuming already deleted.",
+                    rule_id,
+                    resource_id,
                 )
                 return {"success": True, "message": "Rule not found, assumed deleted"}
 
             logger.error(
-                f"API error deleting rule {rule_id} from resource {resource_id}: {e}"
+                "API error deleting rule %s from resource %s: %s",
+                rule_id,
+                resource_id,
+                e,
             )
             return {
                 "success": False,
@@ -290,7 +524,10 @@ class PangolinAPI:
             }
         except Exception as e:
             logger.error(
-                f"Unexpected error deleting rule {rule_id} from resource {resource_id}: {e}"
+                "Unexpected error deleting rule %s from resource %s: %s",
+                rule_id,
+                resource_id,
+                e,
             )
             return {
                 "success": False,
@@ -298,16 +535,22 @@ class PangolinAPI:
                 "error": "UNEXPECTED_ERROR",
             }
 
-    def delete_all_ip_rules(self, resource_id: int) -> Dict[str, Any]:
+    def delete_all_ip_rules(
+        self, resource_id: int, rules: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """
         Delete all IP whitelist rules from a resource.
 
         Args:
             resource_id: ID of the resource
+            rules: Rules freshly fetched by the caller; fetched here if None
 
         Returns:
             Dictionary containing operation result
         """
+        if not self._configured:
+            return self._not_configured_result()
+
         try:
             # Input validation
             if not isinstance(resource_id, int) or resource_id <= 0:
@@ -317,8 +560,9 @@ class PangolinAPI:
                     "error": "INVALID_RESOURCE_ID",
                 }
 
-            # Get all rules for the resource
-            rules = self.get_resource_rules(resource_id)
+            # Decide from fresh rules; the cache may predate another worker's write
+            if rules is None:
+                rules = self._fetch_rules(resource_id)
             if rules is None:
                 return {
                     "success": False,
@@ -334,7 +578,7 @@ class PangolinAPI:
             ]
 
             if not ip_rules:
-                logger.info(f"No IP whitelist rules found for resource {resource_id}")
+                logger.info("No IP whitelist rules found for resource %s", resource_id)
                 return {
                     "success": True,
                     "message": "No IP whitelist rules to delete",
@@ -342,20 +586,38 @@ class PangolinAPI:
                 }
 
             logger.info(
-                f"Deleting {len(ip_rules)} IP whitelist rules from resource {resource_id}"
+                "Deleting %s IP whitelist rules from resource %s",
+                len(ip_rules),
+                resource_id,
             )
 
-            # Delete each IP rule
-            deleted_count = 0
-            failed_deletes = []
-
+            targets = []
             for rule in ip_rules:
                 rule_id = rule.get("id") or rule.get("ruleId")
                 if not rule_id:
-                    logger.warning(f"Rule missing ID, skipping: {rule}")
+                    logger.warning("Rule missing ID, skipping: %s", rule)
                     continue
+                targets.append((rule_id, rule))
+
+            # Issue the DELETEs concurrently; each is an independent round-trip
+            delete_results = []
+            if targets:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_delete_workers, len(targets))
+                ) as executor:
+                    delete_results = list(
+                        executor.map(
+                            lambda target: self.delete_rule(resource_id, target[0]),
+                            targets,
+                        )
+                    )
+
+            self.invalidate_rules_cache(resource_id)
+
+            deleted_count = 0
+            failed_deletes = []
 
-                delete_result = self.delete_rule(resource_id, rule_id)
+            for (rule_id, rule), delete_result in zip(targets, delete_results):
                 if delete_result.get("success"):
                     deleted_count += 1
                 else:
@@ -369,7 +631,9 @@ class PangolinAPI:
 
             if failed_deletes:
                 logger.warning(
-                    f"Failed to delete {len(failed_deletes)} rules from resource {resource_id}"
+                    "Failed to delete %s rules from resource %s",
+                    len(failed_deletes),
+                    resource_id,
                 )
                 return {
                     "success": False,
@@ -379,7 +643,9 @@ class PangolinAPI:
                 }
             else:
                 logger.info(
-                    f"Successfully deleted all {deleted_count} IP whitelist rules from resource {resource_id}"
+                    "Successfully deleted all %s IP whitelist rules from resource %s",
+                    deleted_count,
+                    resource_id,
                 )
                 return {
                     "success": True,
@@ -389,7 +655,9 @@ class PangolinAPI:
 
         except Exception as e:
             logger.error(
-                f"Unexpected error deleting all IP rules from resource {resource_id}: {e}"
+                "Unexpected error deleting all IP rules from resource %s: %s",
+                resource_id,
+                e,
             )
             return {
                 "success": False,
@@ -408,6 +676,9 @@ class PangolinAPI:
         Returns:
             Dictionary containing operation result
         """
+        if not self._configured:
+            return self._not_configured_result()
+
         try:
             # Input validation
             if not validate_ip_address(ip):
@@ -425,14 +696,33 @@ class PangolinAPI:
                 }
 
             logger.info(
-                f"Replacing all IP whitelist rules for resource {resource_id} with {ip}"
+                "Replacing all IP whitelist rules for resource %s with %s",
+                resource_id,
+                ip,
             )
 
+            # One fresh fetch drives both the deletes and the new rule's priority
+            rules = self._fetch_rules(resource_id)
+            if rules is None:
+                return {
+                    "success": False,
+                    "message": "Failed to fetch resource rules",
+                    "error": "FETCH_RULES_ERROR",
+                }
+            remaining_rules = [
+                rule
+                for rule in rules
+                if not (rule.get("match") == "IP" and rule.get("action") == "ACCEPT")
+            ]
+            _, priority = self._analyze_rules(remaining_rules, ip)
+
             # Step 1: Delete all existing IP rules
-            delete_result = self.delete_all_ip_rules(resource_id)
+            delete_result = self.delete_all_ip_rules(resource_id, rules)
             if not delete_result.get("success"):
                 logger.error(
-                    f"Failed to delete existing IP rules for resource {resource_id}: {delete_result.get('message')}"
+                    "Failed to delete existing IP rules for resource %s: %s",
+                    resource_id,
+                    delete_result.get("message"),
                 )
                 return {
                     "success": False,
@@ -440,11 +730,16 @@ class PangolinAPI:
                     "error": "DELETE_FAILED",
                 }
 
-            # Step 2: Add the new IP
-            add_result = self.add_ip_to_whitelist(resource_id, ip)
+            # Step 2: Add the new IP; no IP rules remain, so skip the lookup
+            add_result = self._add_ip_core(
+                resource_id, ip, check_existing=False, priority=priority
+            )
             if not add_result.get("success"):
                 logger.error(
-                    f"Failed to add new IP {ip} for resource {resource_id}: {add_result.get('message')}"
+                    "Failed to add new IP %s for resource %s: %s",
+                    ip,
+                    resource_id,
+                    add_result.get("message"),
                 )
                 return {
                     "success": False,
@@ -454,7 +749,9 @@ class PangolinAPI:
                 }
 
             logger.info(
-                f"Successfully replaced IP whitelist for resource {resource_id} with {ip}"
+                "Successfully replaced IP whitelist for resource %s with %s",
+                resource_id,
+                ip,
             )
             return {
                 "success": True,
@@ -465,7 +762,9 @@ class PangolinAPI:
 
         except Exception as e:
             logger.error(
-                f"Unexpected error replacing IP whitelist for resource {resource_id}: {e}"
+                "Unexpected error replacing IP whitelist for resource %s: %s",
+                resource_id,
+                e,
             )
             return {
                 "success": False,
@@ -484,6 +783,30 @@ class PangolinAPI:
         Returns:
             Dictionary containing operation result
         """
+        return self._add_ip_core(resource_id, ip, check_existing=True)
+
+    def _add_ip_core(
+        self,
+        resource_id: int,
+        ip: str,
+        check_existing: bool,
+        priority: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create an IP whitelist rule, optionally skipping the existing-rule lookup.
+
+        Args:
+            resource_id: ID of the resource
+            ip: IP address to whitelist
+            check_existing: Return early if the IP is already whitelisted
+            priority: Priority for the new rule; computed from the rules if None
+
+        Returns:
+            Dictionary containing operation result
+        """
+        if not self._configured:
+            return self._not_configured_result()
+
         try:
             # Input validation
             if not validate_ip_address(ip):
@@ -500,16 +823,22 @@ class PangolinAPI:
                     "error": "INVALID_RESOURCE_ID",
                 }
 
-            # Check if IP is already whitelisted
-            if self.check_ip_whitelisted(resource_id, ip):
-                return {
-                    "success": True,
-                    "message": "IP is already whitelisted",
-                    "alreadyExists": True,
-                }
-
-            # Get next priority
-            priority = self.get_next_priority(resource_id)
+            # Check if IP is already whitelisted and get next priority from one
+            # fresh fetch, never the cache
+            if check_existing or priority is None:
+                rules = self._fetch_rules(resource_id)
+                is_whitelisted, next_priority = self._analyze_rules(rules or [], ip)
+                if check_existing and is_whitelisted:
+                    logger.info(
+                        "IP %s is already whitelisted for resource %s", ip, resource_id
+                    )
+                    return {
+                        "success": True,
+                        "message": "IP is already whitelisted",
+                        "alreadyExists": True,
+                    }
+                if priority is None:
+                    priority = next_priority
 
             # Prepare the rule payload
             rule_data = {
@@ -521,16 +850,25 @@ class PangolinAPI:
             }
 
             logger.info(
-                f"Adding IP {ip} to whitelist for resource {resource_id} with priority {priority}"
+                "Adding IP %s to whitelist for resource %s with priority %s",
+                ip,
+                resource_id,
+                priority,
             )
 
-            result = self._make_request(
-                "PUT", f"resource/{resource_id}/rule", json=rule_data
-            )
+            # Session headers already declare application/json
+            try:
+                result = self._make_request(
+                    "PUT",
+                    f"resource/{resource_id}/rule",
+                    data=orjson.dumps(rule_data),
+                )
+            finally:
+                self.invalidate_rules_cache(resource_id)
 
             if result.get("success", False):
                 logger.info(
-                    f"Successfully whitelisted IP {ip} for resource {resource_id}"
+                    "Successfully whitelisted IP %s for resource %s", ip, resource_id
                 )
                 return {
                     "success": True,
@@ -540,7 +878,10 @@ class PangolinAPI:
             else:
                 error_msg = result.get("message", "Failed to whitelist IP")
                 logger.error(
-                    f"Failed to whitelist IP {ip} for resource {resource_id}: {error_msg}"
+                    "Failed to whitelist IP %s for resource %s: %s",
+                    ip,
+                    resource_id,
+                    error_msg,
                 )
                 return {
                     "success": False,
@@ -550,7 +891,10 @@ class PangolinAPI:
 
         except PangolinAPIError as e:
             logger.error(
-                f"API error adding IP {ip} to whitelist for resource {resource_id}: {e}"
+                "API error adding IP %s to whitelist for resource %s: %s",
+                ip,
+                resource_id,
+                e,
             )
             return {
                 "success": False,
@@ -559,10 +903,18 @@ class PangolinAPI:
             }
         except Exception as e:
             logger.error(
-                f"Unexpected error adding IP {ip} to whitelist for resource {resource_id}: {e}"
+                "Unexpected error adding IP %s to whitelist for resource %s: %s",
+                ip,
+                resource_id,
+                e,
             )
             return {
                 "success": False,
                 "message": f"Failed to whitelist IP: {str(e)}",
                 "error": "UNEXPECTED_ERROR",
             }
+
+
+def get_pangolin() -> PangolinAPI:
+    """Return the PangolinAPI client shared by the current application."""
+    return current_app.extensions["pangolin"]
@@ -1,8 +1,34 @@
-import ipaddress
+import re
+import socket
+from functools import lru_cache
 from typing import Optional
 
 from flask import Request
 
+# Characters an IPv4/IPv6 literal can contain; cheap reject before parsing
+_IP_CHARS_RE = re.compile(r"[0-9a-fA-F:.]{2,45}")
+
+
+@lru_cache(maxsize=8192)
+def _is_ip_literal(ip: str) -> bool:
+    """
+    Check a string with inet_pton, memoizing the result.
+
+    Args:
+        ip: Candidate IP address string
+
+    Returns:
+        bool: True if the string packs as IPv4 or IPv6
+    """
+    # IPv6 literals always contain a colon and IPv4 ones never do, so one
+    # inet_pton call settles it; it packs straight to bytes in C
+    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+    try:
+        socket.inet_pton(family, ip)
+        return True
+    except OSError:
+        return False
+
 
 def validate_ip_address(ip: str) -> bool:
     """
@@ -14,14 +40,13 @@ def validate_ip_address(ip: str) -> bool:
     Returns:
         bool: True if valid IP address, False otherwise
     """
+    # Type check first: only strings are hashable cache keys we accept
     if not ip or not isinstance(ip, str):
         return False
-    # Validate with ipaddress module
-    try:
-        ipaddress.ip_address(ip)
-        return True
-    except ValueError:
+    # Reject obvious garbage without raising or taking up a cache slot
+    if not _IP_CHARS_RE.fullmatch(ip):
         return False
+    return _is_ip_literal(ip)
 
 
 def get_real_ip(request: Request, depth: int = 0) -> Optional[str]:
@@ -38,11 +63,18 @@ def get_real_ip(request: Request, depth: int = 0) -> Optional[str]:
 
     xff = request.headers.get("X-Forwarded-For", "")
     if xff:
-        # Strip whitespace and split by comma
-        ips = [ip.strip() for ip in xff.split(",")]
-        if len(ips) > depth:
-            return ips[depth]
-        else:
-            return ips[0]
+        # Scan to the entry at depth instead of splitting the whole chain
+        start = 0
+        for _ in range(depth):
+            comma = xff.find(",", start)
+            if comma == -1:
+                # Fewer entries than depth; use the first one
+                start = 0
+                break
+            start = comma + 1
+        end = xff.find(",", start)
+        token = xff[start : end if end != -1 else None].strip()
+        # An empty entry (e.g. ", 1.2.3.4" or a trailing comma) is no address
+        return token or request.remote_addr
     # Fallback last to remote_addr
     return request.remote_addr
@@ -0,0 +1,89 @@
+import logging
+from functools import lru_cache, wraps
+from typing import Any, Callable, Tuple, Union
+
+import orjson
+from flask import Response, request
+
+from app.utils import validate_ip_address
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _error_body(error: str) -> bytes:
+    """Encode an error payload once; route error messages are fixed strings."""
+    return orjson.dumps({"success": False, "error": error})
+
+
+def error_response(error: str, status: int) -> Tuple[Response, int]:
+    """
+    Build a JSON error response from a pre-encoded body.
+
+    Args:
+        error: Error message for the client
+        status: HTTP status code
+
+    Returns:
+        Tuple of (response, status) as returned from a view
+    """
+    return Response(_error_body(error), mimetype="application/json"), status
+
+
+def parse_whitelist_payload(data: Any) -> Union[Tuple[int, str], str]:
+    """
+    Validate a resourceId/ip request payload.
+
+    Args:
+        data: Decoded JSON request body
+
+    Returns:
+        Tuple of (resource_id, ip) if valid, otherwise the error message
+    """
+    if not data or not isinstance(data, dict):
+        return "No JSON data provided"
+
+    resource_id = data.get("resourceId")
+    try:
+        if resource_id is not None:
+            resource_id = int(resource_id)
+    except (ValueError, TypeError):
+        logger.error("Invalid resource_id format: %s", data.get("resourceId"))
+        return "Invalid resource ID format"
+    if not resource_id or resource_id <= 0:
+        logger.warning("Invalid resource_id: %r", resource_id)
+        return "Invalid resource ID"
+
+    ip = data.get("ip")
+    if not validate_ip_address(ip):
+        logger.error("Invalid IP address: %s", ip)
+        return "Invalid IP address"
+
+    return resource_id, ip
+
+
+def require_whitelist_payload(view: Callable) -> Callable:
+    """
+    Decorate a view that takes a validated resource_id and ip from the JSON body.
+
+    Args:
+        view: View function accepting resource_id and ip as its first arguments
+
+    Returns:
+        Wrapped view that returns a 400 response for missing or invalid input
+    """
+
+    @wraps(view)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        # silent=True yields None for a bad body or content type instead of raising
+        data = request.get_json(silent=True)
+        if not data:
+            logger.error("No JSON data provided to %s endpoint", request.endpoint)
+            return error_response("No JSON data provided", 400)
+
+        parsed = parse_whitelist_payload(data)
+        if isinstance(parsed, str):
+            return error_response(parsed, 400)
+        return view(*parsed, *args, **kwargs)
+
+    return wrapper
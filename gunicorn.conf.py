@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the PG IP Whitelister application.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Requests mostly wait on the Pangolin API, so each worker runs a pool of
+# threads that overlap those round-trips over the shared HTTP session
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Development server entry point for the PG IP Whitelister application.
+
+Production runs gunicorn against wsgi:app; this is for local use only.
+"""
+
+from wsgi import app
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5000)
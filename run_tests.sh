@@ -34,7 +34,13 @@ case "${1:-all}" in
         ;;
     "all")
         echo "🎯 Running all tests..."
-        uv run pytest tests/ -v
+        # Any single test over 0.5s is a regression in suite speed
+        uv run pytest tests/ -v --fail-slow=0.5s
+        ;;
+    "parallel")
+        echo "🚀 Running all tests across CPU cores..."
+        # loadfile keeps each module on one worker so module fixtures build once
+        uv run pytest tests/ -n auto --dist=loadfile
         ;;
     "lint")
         echo "🔍 Running linting..."
@@ -47,7 +53,7 @@ case "${1:-all}" in
         uv run black app/ tests/
         ;;
     *)
-        echo "Usage: $0 {unit|integration|coverage|fast|all|lint|format}"
+        echo "Usage: $0 {unit|integration|coverage|fast|all|parallel|lint|format}"
         echo ""
         echo "Options:"
         echo "  unit       - Run unit tests only"
@@ -55,6 +61,7 @@ case "${1:-all}" in
         echo "  coverage   - Run tests with coverage report"
         echo "  fast       - Run fast tests (exclude slow ones)"
         echo "  all        - Run all tests (default)"
+        echo "  parallel   - Run all tests in parallel (pytest-xdist)"
         echo "  lint       - Run linting and type checking"
         echo "  format     - Format code with black"
         exit 1
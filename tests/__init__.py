@@ -1 +0,0 @@
-# Tests package for PG IP Whitelister
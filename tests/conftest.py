@@ -1,13 +1,23 @@
+from unittest.mock import create_autospec
+
 import pytest
+import responses
 
 from app import create_app
-from app.config import TestingConfig
+from app.pangolin_api import PangolinAPI
 
+PANGOLIN_TEST_CONFIG = {
+    "TESTING": True,
+    "PANGOLIN_API_URL": "http://pangolin.test/v1",
+    "PANGOLIN_API_KEY": "test-key",
+    "PANGOLIN_ORG_ID": "test-org",
+}
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def app():
-    """Create application for testing."""
-    app = create_app(TestingConfig())
+    """Create application for testing once; tests must not leave it modified."""
+    app = create_app(dict(PANGOLIN_TEST_CONFIG))
     return app
 
 
@@ -21,3 +31,32 @@ def client(app):
 def runner(app):
     """Create test runner."""
     return app.test_cli_runner()
+
+
+@pytest.fixture(scope="session")
+def pangolin_api_template():
+    """Build one autospec'd PangolinAPI mock; autospec is costly per test."""
+    return create_autospec(PangolinAPI, instance=True)
+
+
+@pytest.fixture
+def mock_pangolin(monkeypatch, pangolin_api_template):
+    """Replace the routes' Pangolin client with the reset autospec'd mock."""
+    # A copy would share child mocks with the template, so reset it instead
+    pangolin_api_template.reset_mock(return_value=True, side_effect=True)
+    monkeypatch.setattr("app.routes.get_pangolin", lambda: pangolin_api_template)
+    return pangolin_api_template
+
+
+@pytest.fixture
+def http_app():
+    """Create an application whose Pangolin client talks to a fake base URL."""
+    # Per test: the client's response caches must not leak between tests
+    return create_app(dict(PANGOLIN_TEST_CONFIG))
+
+
+@pytest.fixture
+def mocked_pangolin_http():
+    """Intercept the real PangolinAPI client's HTTP calls with responses."""
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        yield rsps
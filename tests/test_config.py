@@ -124,7 +124,9 @@ class TestConfig:
     def test_production_config_init_app(self, monkeypatch, tmp_path):
         """Test production configuration initialization."""
         import logging
+        from logging.handlers import QueueHandler
 
+        import app.config as app_config
         from app.config import ProductionConfig
 
         # Create logs directory
@@ -137,11 +139,13 @@ class TestConfig:
         app.testing = False
         app.logger = MagicMock()
 
-        # Mock os.path.exists and os.mkdir
-        mock_exists = MagicMock(return_value=False)
-        mock_mkdir = MagicMock()
-        monkeypatch.setattr("os.path.exists", mock_exists)
-        monkeypatch.setattr("os.mkdir", mock_mkdir)
+        monkeypatch.setattr("app.config._log_listener", None)
+        monkeypatch.setattr("atexit.register", MagicMock())
+        monkeypatch.delenv("LOG_TO_STDOUT", raising=False)
+
+        # Mock os.makedirs
+        mock_makedirs = MagicMock()
+        monkeypatch.setattr("os.makedirs", mock_makedirs)
 
         # Mock RotatingFileHandler - fix the import path
         mock_handler_instance = MagicMock()
@@ -149,13 +153,50 @@ class TestConfig:
         monkeypatch.setattr("logging.handlers.RotatingFileHandler", mock_handler_class)
 
         config.init_app(app)
+        listener = app_config._log_listener
+        listener.stop()
 
-        # Verify file handler was created
+        # Verify file handler was created and served by the queue listener
         mock_handler_class.assert_called_once()
         mock_handler_instance.setFormatter.assert_called_once()
         mock_handler_instance.setLevel.assert_called_once_with(logging.INFO)
-        app.logger.addHandler.assert_called_once_with(mock_handler_instance)
+        assert listener.handlers == (mock_handler_instance,)
+        app.logger.addHandler.assert_called_once()
+        queue_handler = app.logger.addHandler.call_args.args[0]
+        assert isinstance(queue_handler, QueueHandler)
+        assert queue_handler.queue is listener.queue
         app.logger.setLevel.assert_called_once_with(logging.INFO)
+        mock_makedirs.assert_called_once_with("logs", exist_ok=True)
+
+        # A second app in the same process must not stack another handler
+        config.init_app(app)
+        mock_handler_class.assert_called_once()
+
+    def test_production_config_init_app_stdout(self, monkeypatch):
+        """Test production logging goes to stdout when LOG_TO_STDOUT is set."""
+        import logging
+
+        import app.config as app_config
+        from app.config import ProductionConfig
+
+        app = MagicMock()
+        app.debug = False
+        app.testing = False
+        app.logger = MagicMock()
+
+        monkeypatch.setattr("app.config._log_listener", None)
+        monkeypatch.setattr("atexit.register", MagicMock())
+        monkeypatch.setenv("LOG_TO_STDOUT", "1")
+        mock_makedirs = MagicMock()
+        monkeypatch.setattr("os.makedirs", mock_makedirs)
+
+        ProductionConfig().init_app(app)
+        listener = app_config._log_listener
+        listener.stop()
+
+        (handler,) = listener.handlers
+        assert type(handler) is logging.StreamHandler
+        mock_makedirs.assert_not_called()
 
     def test_testing_config(self):
         """Test testing configuration."""
@@ -184,3 +225,25 @@ class TestConfig:
         assert config["testing"] == TestingConfig
         assert config["production"] == ProductionConfig
         assert config["default"] == DevelopmentConfig
+
+    def test_create_app_uses_env_config(self, monkeypatch):
+        """Test that the FLASK_ENV config is not overridden by the default."""
+        from app import create_app
+
+        monkeypatch.setenv("FLASK_ENV", "production")
+        app = create_app({"TESTING": True})
+
+        assert app.config["DEBUG"] is False
+        assert app.config["SESSION_COOKIE_SECURE"] is True
+
+    def test_create_app_unknown_env_falls_back_to_default(self, monkeypatch):
+        """Test that an unknown FLASK_ENV uses the default configuration."""
+        from app import create_app
+        from app.config import TestingConfig, config
+
+        monkeypatch.setitem(config, "default", TestingConfig)
+        monkeypatch.setenv("FLASK_ENV", "staging")
+        app = create_app()
+
+        assert app.config["TESTING"] is True
+        assert app.config["WTF_CSRF_ENABLED"] is False
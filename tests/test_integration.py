@@ -1,228 +1,236 @@
 """Integration tests for the full application workflow."""
 
 import json
-from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Shared read-only literals; copy resource tuples before handing them to a mock
+LOCAL_WHITELIST_BODY = {"resourceId": 1, "ip": "127.0.0.1"}
+MOCK_RESOURCES = (
+    {
+        "resourceId": 1,
+        "name": "Test Resource 1",
+        "enabled": True,
+        "whitelist": True,
+        "fullDomain": "test1.example.com",
+    },
+    {
+        "resourceId": 2,
+        "name": "Test Resource 2",
+        "enabled": True,
+        "whitelist": False,
+        "fullDomain": "test2.example.com",
+    },
+)
+PLEX_RESOURCES = (
+    {
+        "resourceId": 1,
+        "name": "Plex",
+        "enabled": True,
+        "whitelist": True,
+        "fullDomain": "plex.example.com",
+    },
+)
+
+
+def ok_json(response, status_code=200):
+    """Assert the response status and return its decoded JSON body."""
+    assert response.status_code == status_code
+    return response.get_json()
 
 
 class TestIntegration:
     """Integration test cases for the full application workflow."""
 
-    def test_full_whitelist_workflow(self, client):
-        """Test the complete whitelisting workflow."""
-        # Mock the PangolinAPI responses
-        mock_resources = [
-            {
-                "resourceId": 1,
-                "name": "Test Resource 1",
-                "enabled": True,
-                "whitelist": True,
-                "fullDomain": "test1.example.com",
-            },
-            {
-                "resourceId": 2,
-                "name": "Test Resource 2",
-                "enabled": True,
-                "whitelist": False,
-                "fullDomain": "test2.example.com",
-            },
-        ]
-
-        with patch("app.routes.PangolinAPI") as MockPangolinAPI:
-            # Setup mock API
-            mock_api = MagicMock()
-            MockPangolinAPI.return_value = mock_api
-
-            # Mock get_resources
-            mock_api.get_resources.return_value = mock_resources
+    @pytest.mark.parametrize(
+        "resources,rule_id",
+        [(MOCK_RESOURCES, 123), (PLEX_RESOURCES, 456)],
+        ids=["two-resources", "plex"],
+    )
+    def test_whitelist_workflow(self, client, mock_pangolin, resources, rule_id):
+        """Test the load, detect, check and whitelist flow the frontend drives."""
+        mock_pangolin.get_resources.return_value = list(resources)
+        mock_pangolin.check_ip_whitelisted.return_value = False
+        mock_pangolin.add_ip_to_whitelist.return_value = {
+            "success": True,
+            "message": "IP successfully whitelisted",
+            "rule": {"ruleId": rule_id},
+        }
+
+        # 1. Load resources
+        data = ok_json(client.get("/api/resources"))
+        assert data["success"] is True
+        assert len(data["data"]) == len(resources)
 
-            # Mock check_ip_whitelisted
-            mock_api.check_ip_whitelisted.side_effect = [
-                False,
-                True,
-            ]  # First resource not whitelisted, second is
+        # 2. Detect the client IP
+        data = ok_json(client.get("/api/client-ip"))
+        assert data["success"] is True
+        client_ip = data["ip"]
+        assert client_ip == "127.0.0.1"
 
-            # Mock add_ip_to_whitelist
-            mock_api.add_ip_to_whitelist.return_value = {
-                "success": True,
-                "message": "IP successfully whitelisted",
-                "rule": {"ruleId": 123},
-            }
+        # 3. Check whitelist status
+        payload = {"resourceId": 1, "ip": client_ip}
+        data = ok_json(client.post("/api/check-whitelist", json=payload))
+        assert data["success"] is True
+        assert data["isWhitelisted"] is False
 
-            # Test 1: Get resources
-            response = client.get("/api/resources")
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data["success"] is True
-            assert len(data["data"]) == 2
-
-            # Test 2: Get client IP
-            response = client.get("/api/client-ip")
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data["success"] is True
-            assert data["ip"] == "127.0.0.1"
-
-            # Test 3: Check whitelist status
-            response = client.post(
-                "/api/check-whitelist",
-                data=json.dumps({"resourceId": 1, "ip": "127.0.0.1"}),
-                content_type="application/json",
-            )
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data["success"] is True
-            assert data["isWhitelisted"] is False
-
-            # Test 4: Add IP to whitelist
-            response = client.post(
-                "/api/whitelist",
-                data=json.dumps({"resourceId": 1, "ip": "127.0.0.1"}),
-                content_type="application/json",
-            )
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data["success"] is True
-            assert "ruleId" in data["rule"]
+        # 4. Whitelist the IP
+        data = ok_json(client.post("/api/whitelist", json=payload))
+        assert data["success"] is True
+        assert data["rule"]["ruleId"] == rule_id
 
-    def test_error_handling_workflow(self, client):
+    def test_error_handling_workflow(self, client, mock_pangolin):
         """Test error handling in the workflow."""
-        with patch("app.routes.PangolinAPI") as MockPangolinAPI:
-            # Setup mock API to simulate failures
-            mock_api = MagicMock()
-            MockPangolinAPI.return_value = mock_api
+        # Simulate an API failure
+        mock_pangolin.get_resources.return_value = None
 
-            # Test API failure
-            mock_api.get_resources.return_value = None
-
-            response = client.get("/api/resources")
-            assert response.status_code == 500
-            data = json.loads(response.data)
-            assert data["success"] is False
-            assert "error" in data
+        data = ok_json(client.get("/api/resources"), 500)
+        assert data["success"] is False
+        assert "error" in data
 
     def test_invalid_input_handling(self, client):
         """Test handling of invalid input throughout the workflow."""
         # Test invalid resource ID
         response = client.post(
-            "/api/check-whitelist",
-            data=json.dumps({"resourceId": "invalid", "ip": "127.0.0.1"}),
-            content_type="application/json",
+            "/api/check-whitelist", json={"resourceId": "invalid", "ip": "127.0.0.1"}
         )
         assert response.status_code == 400
 
         # Test invalid IP
         response = client.post(
-            "/api/whitelist",
-            data=json.dumps({"resourceId": 1, "ip": "invalid-ip"}),
-            content_type="application/json",
+            "/api/whitelist", json={"resourceId": 1, "ip": "invalid-ip"}
         )
         assert response.status_code == 400
 
         # Test missing data
-        response = client.post(
-            "/api/whitelist", data=json.dumps({}), content_type="application/json"
-        )
+        response = client.post("/api/whitelist", json={})
         assert response.status_code == 400
 
-    def test_frontend_integration_simulation(self, client):
-        """Simulate frontend integration by testing the complete API flow."""
-        with patch("app.routes.PangolinAPI") as MockPangolinAPI:
-            mock_api = MagicMock()
-            MockPangolinAPI.return_value = mock_api
-
-            # Setup realistic API responses
-            mock_api.get_resources.return_value = [
-                {
-                    "resourceId": 1,
-                    "name": "Plex",
-                    "enabled": True,
-                    "whitelist": True,
-                    "fullDomain": "plex.example.com",
-                }
-            ]
-
-            mock_api.check_ip_whitelisted.return_value = False
-            mock_api.add_ip_to_whitelist.return_value = {
-                "success": True,
-                "message": "IP successfully whitelisted",
-                "rule": {"ruleId": 456},
-            }
-
-            # Simulate frontend workflow
-            # 1. Load resources
-            response = client.get("/api/resources")
-            assert response.status_code == 200
-
-            # 2. Get client IP
-            response = client.get("/api/client-ip")
-            assert response.status_code == 200
-            client_ip = json.loads(response.data)["ip"]
-
-            # 3. Check whitelist status
-            response = client.post(
-                "/api/check-whitelist",
-                data=json.dumps({"resourceId": 1, "ip": client_ip}),
-                content_type="application/json",
-            )
-            assert response.status_code == 200
-            assert json.loads(response.data)["isWhitelisted"] is False
-
-            # 4. Whitelist IP
-            response = client.post(
-                "/api/whitelist",
-                data=json.dumps({"resourceId": 1, "ip": client_ip}),
-                content_type="application/json",
-            )
-            assert response.status_code == 200
-            assert json.loads(response.data)["success"] is True
-
-    def test_concurrent_requests(self, client):
+    def test_concurrent_requests(self, client, mock_pangolin):
         """Test handling of concurrent requests."""
         import threading
 
+        # Patch once up front; threads only issue requests
+        mock_pangolin.get_resources.return_value = [{"resourceId": 1, "name": "Test"}]
         results = []
 
         def make_request():
-            with patch("app.routes.PangolinAPI") as MockPangolinAPI:
-                mock_api = MagicMock()
-                MockPangolinAPI.return_value = mock_api
-                mock_api.get_resources.return_value = [
-                    {"resourceId": 1, "name": "Test"}
-                ]
-
-                response = client.get("/api/resources")
-                results.append(response.status_code)
-
-        # Create multiple threads
-        threads = []
-        for _ in range(5):
-            thread = threading.Thread(target=make_request)
-            threads.append(thread)
+            response = client.get("/api/resources")
+            results.append(response.status_code)
+
+        threads = [threading.Thread(target=make_request) for _ in range(5)]
+        for thread in threads:
             thread.start()
 
         # Wait for all threads to complete
         for thread in threads:
             thread.join()
 
-        # All requests should succeed
-        assert all(status == 200 for status in results)
-        assert len(results) == 5
+        # All requests should succeed and reach the one shared mock
+        assert results == [200] * 5
+        assert mock_pangolin.get_resources.call_count == 5
 
-    def test_client_ip_route_remote_addr(self, client):
-        """Test client IP detection using remote_addr."""
-        response = client.get("/api/client-ip")
-        assert response.status_code == 200
-        data = json.loads(response.data)
-        assert data["success"] is True
-        # Flask test client sets remote_addr to '127.0.0.1' by default
-        assert data["ip"] == "127.0.0.1"
-
-    def test_client_ip_route_x_forwarded_for(self, client):
-        """Test client IP detection using X-Forwarded-For header."""
-        headers = {"X-Forwarded-For": "1.2.3.4, 5.6.7.8"}
-        response = client.get("/api/client-ip", headers=headers)
-        assert response.status_code == 200
-        data = json.loads(response.data)
+
+class TestPangolinHTTPIntegration:
+    """Workflow tests running the real PangolinAPI client against mocked HTTP."""
+
+    @pytest.fixture
+    def client(self, http_app):
+        """Create a test client for the HTTP-mocked application."""
+        return http_app.test_client()
+
+    @pytest.fixture
+    def base_url(self, http_app):
+        """Base URL the application's Pangolin client talks to."""
+        return http_app.config["PANGOLIN_API_URL"]
+
+    def test_full_whitelist_workflow(self, client, base_url, mocked_pangolin_http):
+        """Test listing, checking and whitelisting through the HTTP layer."""
+        mocked_pangolin_http.get(
+            f"{base_url}/org/test-org/resources",
+            json={
+                "success": True,
+                "data": {"resources": [{"resourceId": 1, "name": "Plex"}]},
+            },
+        )
+        mocked_pangolin_http.get(
+            f"{base_url}/resource/1/rules",
+            json={
+                "success": True,
+                "data": {
+                    "rules": [
+                        {"match": "IP", "action": "ACCEPT", "value": "10.0.0.5"},
+                        {"match": "PATH", "action": "ACCEPT", "priority": 4},
+                    ]
+                },
+            },
+        )
+        put = mocked_pangolin_http.put(
+            f"{base_url}/resource/1/rule",
+            json={"success": True, "data": {"ruleId": 123}},
+        )
+
+        data = ok_json(client.get("/api/resources"))
+        assert data["data"] == [{"resourceId": 1, "name": "Plex"}]
+
+        data = ok_json(client.post("/api/check-whitelist", json=LOCAL_WHITELIST_BODY))
+        assert data["isWhitelisted"] is False
+
+        data = ok_json(client.post("/api/whitelist", json=LOCAL_WHITELIST_BODY))
+        assert data["rule"] == {"ruleId": 123}
+
+        assert put.call_count == 1
+        sent = json.loads(put.calls[0].request.body)
+        assert sent["match"] == "IP"
+        assert sent["value"] == "127.0.0.1"
+        assert sent["priority"] == 5
+        assert put.calls[0].request.headers["Authorization"] == "Bearer test-key"
+
+    def test_replace_ip_whitelist(self, client, base_url, mocked_pangolin_http):
+        """Test replacing IP rules deletes each old rule before adding the new one."""
+        mocked_pangolin_http.get(
+            f"{base_url}/resource/1/rules",
+            json={
+                "success": True,
+                "data": {
+                    "rules": [
+                        {"ruleId": 11, "match": "IP", "action": "ACCEPT"},
+                        {"ruleId": 12, "match": "IP", "action": "ACCEPT"},
+                    ]
+                },
+            },
+        )
+        deletes = [
+            mocked_pangolin_http.delete(
+                f"{base_url}/resource/1/rule/{rule_id}", json={"success": True}
+            )
+            for rule_id in (11, 12)
+        ]
+        put = mocked_pangolin_http.put(
+            f"{base_url}/resource/1/rule",
+            json={"success": True, "data": {"ruleId": 13}},
+        )
+
+        data = ok_json(
+            client.put(
+                "/api/resource/1/replace-ip-whitelist", json={"ip": "192.168.1.1"}
+            )
+        )
         assert data["success"] is True
-        # Should return the leftmost IP by default (depth=0)
-        assert data["ip"] == "1.2.3.4"
+        assert data["deleted_count"] == 2
+        assert [delete.call_count for delete in deletes] == [1, 1]
+        assert put.call_count == 1
+
+    def test_upstream_error_surfaces_as_failure(
+        self, client, base_url, mocked_pangolin_http
+    ):
+        """Test an upstream HTTP error is reported as a failed lookup."""
+        mocked_pangolin_http.get(
+            f"{base_url}/org/test-org/resources",
+            json={"message": "Forbidden"},
+            status=403,
+        )
+
+        data = ok_json(client.get("/api/resources"), 500)
+
+        assert data["success"] is False
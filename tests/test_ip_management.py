@@ -1,33 +1,17 @@
-from unittest.mock import patch
+from unittest.mock import Mock
 
 import pytest
 
-from app import create_app
 from app.pangolin_api import PangolinAPI
 
 
 class TestIPManagement:
     """Test IP management functionality."""
 
-    @pytest.fixture
-    def app(self):
-        """Create test app."""
-        config = {
-            "TESTING": True,
-            "PANGOLIN_API_URL": "http://test-api",
-            "PANGOLIN_API_KEY": "test-key",
-            "PANGOLIN_ORG_ID": "test-org",
-        }
-        return create_app(config)
-
-    @pytest.fixture
-    def client(self, app):
-        """Create test client."""
-        return app.test_client()
-
-    @patch.object(PangolinAPI, "delete_rule")
-    def test_delete_rule_success(self, mock_delete, client):
+    def test_delete_rule_success(self, client, monkeypatch):
         """Test successful rule deletion."""
+        mock_delete = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_rule", mock_delete)
         mock_delete.return_value = {"success": True, "message": "Rule deleted"}
 
         response = client.delete("/api/resource/1/rule/123")
@@ -37,9 +21,10 @@ class TestIPManagement:
         assert data["success"] is True
         mock_delete.assert_called_once_with(1, 123)
 
-    @patch.object(PangolinAPI, "delete_rule")
-    def test_delete_rule_failure(self, mock_delete, client):
+    def test_delete_rule_failure(self, client, monkeypatch):
         """Test rule deletion failure."""
+        mock_delete = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_rule", mock_delete)
         mock_delete.return_value = {"success": False, "message": "Rule not found"}
 
         response = client.delete("/api/resource/1/rule/123")
@@ -67,9 +52,10 @@ class TestIPManagement:
         assert data["success"] is False
         assert "Invalid rule ID" in data["error"]
 
-    @patch.object(PangolinAPI, "delete_all_ip_rules")
-    def test_delete_all_ip_rules_success(self, mock_delete_all, client):
+    def test_delete_all_ip_rules_success(self, client, monkeypatch):
         """Test successful deletion of all IP rules."""
+        mock_delete_all = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_all_ip_rules", mock_delete_all)
         mock_delete_all.return_value = {
             "success": True,
             "message": "Deleted 3 rules",
@@ -84,9 +70,10 @@ class TestIPManagement:
         assert data["deleted_count"] == 3
         mock_delete_all.assert_called_once_with(1)
 
-    @patch.object(PangolinAPI, "delete_all_ip_rules")
-    def test_delete_all_ip_rules_none_found(self, mock_delete_all, client):
+    def test_delete_all_ip_rules_none_found(self, client, monkeypatch):
         """Test deletion when no IP rules exist."""
+        mock_delete_all = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_all_ip_rules", mock_delete_all)
         mock_delete_all.return_value = {
             "success": True,
             "message": "No IP whitelist rules to delete",
@@ -100,9 +87,10 @@ class TestIPManagement:
         assert data["success"] is True
         assert data["deleted_count"] == 0
 
-    @patch.object(PangolinAPI, "replace_ip_whitelist")
-    def test_replace_ip_whitelist_success(self, mock_replace, client):
+    def test_replace_ip_whitelist_success(self, client, monkeypatch):
         """Test successful IP whitelist replacement."""
+        mock_replace = Mock()
+        monkeypatch.setattr(PangolinAPI, "replace_ip_whitelist", mock_replace)
         mock_replace.return_value = {
             "success": True,
             "message": "Successfully replaced all IP rules with 192.168.1.1",
@@ -113,7 +101,6 @@ class TestIPManagement:
         response = client.put(
             "/api/resource/1/replace-ip-whitelist",
             json={"ip": "192.168.1.1"},
-            content_type="application/json",
         )
 
         assert response.status_code == 200
@@ -134,12 +121,31 @@ class TestIPManagement:
         assert data["success"] is False
         assert "Invalid JSON data" in data["error"]
 
+    def test_replace_ip_whitelist_wrong_content_type(self, client):
+        """Test replace IP whitelist with a non-JSON body."""
+        response = client.put(
+            "/api/resource/1/replace-ip-whitelist",
+            data="ip=192.168.1.1",
+            content_type="application/x-www-form-urlencoded",
+        )
+
+        assert response.status_code == 400
+        assert "Invalid JSON data" in response.get_json()["error"]
+
+    def test_replace_ip_whitelist_non_object_json(self, client):
+        """Test replace IP whitelist with a JSON body that is not an object."""
+        response = client.put(
+            "/api/resource/1/replace-ip-whitelist", json=["192.168.1.1"]
+        )
+
+        assert response.status_code == 400
+        assert "No JSON data provided" in response.get_json()["error"]
+
     def test_replace_ip_whitelist_invalid_ip(self, client):
         """Test replace IP whitelist with invalid IP."""
         response = client.put(
             "/api/resource/1/replace-ip-whitelist",
             json={"ip": "invalid-ip"},
-            content_type="application/json",
         )
 
         assert response.status_code == 400
@@ -152,7 +158,6 @@ class TestIPManagement:
         response = client.put(
             "/api/resource/0/replace-ip-whitelist",
             json={"ip": "192.168.1.1"},
-            content_type="application/json",
         )
 
         assert response.status_code == 400
@@ -164,9 +169,9 @@ class TestIPManagement:
 class TestPangolinAPIIPManagement:
     """Test PangolinAPI IP management methods."""
 
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def api(self):
-        """Create PangolinAPI instance."""
+        """Create PangolinAPI instance, shared by the class's tests."""
         config = {
             "PANGOLIN_API_URL": "http://test-api",
             "PANGOLIN_API_KEY": "test-key",
@@ -174,9 +179,10 @@ class TestPangolinAPIIPManagement:
         }
         return PangolinAPI(config)
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_delete_rule_success(self, mock_request, api):
+    def test_delete_rule_success(self, api, monkeypatch):
         """Test successful rule deletion."""
+        mock_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_request)
         mock_request.return_value = {"success": True}
 
         result = api.delete_rule(1, 123)
@@ -184,9 +190,10 @@ class TestPangolinAPIIPManagement:
         assert result["success"] is True
         mock_request.assert_called_once_with("DELETE", "resource/1/rule/123")
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_delete_rule_failure(self, mock_request, api):
+    def test_delete_rule_failure(self, api, monkeypatch):
         """Test rule deletion failure."""
+        mock_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_request)
         mock_request.return_value = {"success": False, "message": "Rule not found"}
 
         result = api.delete_rule(1, 123)
@@ -208,11 +215,13 @@ class TestPangolinAPIIPManagement:
         assert result["success"] is False
         assert "Invalid rule ID" in result["message"]
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    @patch.object(PangolinAPI, "delete_rule")
-    def test_delete_all_ip_rules_success(self, mock_delete, mock_get_rules, api):
+    def test_delete_all_ip_rules_success(self, api, monkeypatch):
         """Test successful deletion of all IP rules."""
-        mock_get_rules.return_value = [
+        mock_delete = Mock()
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_rule", mock_delete)
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = [
             {"id": 1, "match": "IP", "action": "ACCEPT", "value": "192.168.1.1"},
             {"id": 2, "match": "IP", "action": "ACCEPT", "value": "192.168.1.2"},
             {"id": 3, "match": "USER", "action": "ACCEPT", "value": "test@example.com"},
@@ -225,10 +234,11 @@ class TestPangolinAPIIPManagement:
         assert result["deleted_count"] == 2
         assert mock_delete.call_count == 2
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    def test_delete_all_ip_rules_none_found(self, mock_get_rules, api):
+    def test_delete_all_ip_rules_none_found(self, api, monkeypatch):
         """Test deletion when no IP rules exist."""
-        mock_get_rules.return_value = [
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = [
             {"id": 3, "match": "USER", "action": "ACCEPT", "value": "test@example.com"}
         ]
 
@@ -238,10 +248,18 @@ class TestPangolinAPIIPManagement:
         assert result["deleted_count"] == 0
         assert "No IP whitelist rules to delete" in result["message"]
 
-    @patch.object(PangolinAPI, "delete_all_ip_rules")
-    @patch.object(PangolinAPI, "add_ip_to_whitelist")
-    def test_replace_ip_whitelist_success(self, mock_add, mock_delete, api):
+    def test_replace_ip_whitelist_success(self, api, monkeypatch):
         """Test successful IP whitelist replacement."""
+        mock_add = Mock()
+        mock_delete = Mock()
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "_add_ip_core", mock_add)
+        monkeypatch.setattr(PangolinAPI, "delete_all_ip_rules", mock_delete)
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = [
+            {"id": 1, "match": "IP", "action": "ACCEPT", "priority": 9},
+            {"id": 2, "match": "PATH", "action": "ACCEPT", "priority": 4},
+        ]
         mock_delete.return_value = {"success": True, "deleted_count": 2}
         mock_add.return_value = {
             "success": True,
@@ -253,12 +271,19 @@ class TestPangolinAPIIPManagement:
         assert result["success"] is True
         assert result["deleted_count"] == 2
         assert "new_rule" in result
-        mock_delete.assert_called_once_with(1)
-        mock_add.assert_called_once_with(1, "192.168.1.1")
+        mock_delete.assert_called_once_with(1, mock_fetch_rules.return_value)
+        # Only the surviving PATH rule counts towards the new priority
+        mock_add.assert_called_once_with(
+            1, "192.168.1.1", check_existing=False, priority=5
+        )
 
-    @patch.object(PangolinAPI, "delete_all_ip_rules")
-    def test_replace_ip_whitelist_delete_failure(self, mock_delete, api):
+    def test_replace_ip_whitelist_delete_failure(self, api, monkeypatch):
         """Test IP whitelist replacement when delete fails."""
+        mock_delete = Mock()
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_all_ip_rules", mock_delete)
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = []
         mock_delete.return_value = {"success": False, "message": "Delete failed"}
 
         result = api.replace_ip_whitelist(1, "192.168.1.1")
@@ -272,3 +297,29 @@ class TestPangolinAPIIPManagement:
 
         assert result["success"] is False
         assert "Invalid IP address format" in result["message"]
+
+    def test_replace_ip_whitelist_fetches_rules_once(self, api, monkeypatch):
+        """Test that replacing the whitelist lists the rules a single time."""
+        mock_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_request)
+        mock_request.side_effect = [
+            {
+                "success": True,
+                "data": {
+                    "rules": [
+                        {"id": 7, "match": "IP", "action": "ACCEPT", "value": "1.1.1.1"}
+                    ]
+                },
+            },
+            {"success": True},
+            {"success": True, "data": {"ruleId": 8}},
+        ]
+
+        result = api.replace_ip_whitelist(1, "192.168.1.1")
+
+        assert result["success"] is True
+        assert [call.args[0] for call in mock_request.call_args_list] == [
+            "GET",
+            "DELETE",
+            "PUT",
+        ]
@@ -0,0 +1,92 @@
+"""Tests for the orjson-backed JSON provider."""
+
+import decimal
+from unittest.mock import patch
+
+import pytest
+from flask import jsonify, request
+from werkzeug.exceptions import BadRequest
+
+from app.json_provider import OrjsonProvider
+
+
+class TestOrjsonProvider:
+    """Test cases for OrjsonProvider."""
+
+    def test_app_uses_orjson_provider(self, app):
+        """Test that the application installs the orjson provider."""
+        assert isinstance(app.json, OrjsonProvider)
+
+    def test_jsonify_response(self, app):
+        """Test jsonify output through the provider."""
+        with app.app_context():
+            response = jsonify({"success": True, "data": [1, 2]})
+
+        assert response.mimetype == "application/json"
+        assert response.get_json() == {"success": True, "data": [1, 2]}
+
+    def test_dumps_and_loads_round_trip(self, app):
+        """Test serializing and parsing through app.json."""
+        payload = {"resourceId": 1, "ip": "192.168.1.1", "ok": None}
+
+        assert app.json.loads(app.json.dumps(payload)) == payload
+        assert app.json.loads(b'{"a": 1}') == {"a": 1}
+
+    def test_dumps_non_native_types(self, app):
+        """Test types orjson cannot encode on its own."""
+        assert app.json.dumps({1: decimal.Decimal("1.50")}) == '{"1":"1.50"}'
+
+        with pytest.raises(TypeError):
+            app.json.dumps({"value": object()})
+
+    def test_invalid_request_json_is_bad_request(self, app):
+        """Test malformed request bodies are reported as a bad request."""
+        with app.test_request_context(
+            "/api/whitelist",
+            method="POST",
+            data="{not json",
+            content_type="application/json",
+        ):
+            with pytest.raises(BadRequest):
+                request.get_json()
+
+    def test_request_json_parsed_by_provider(self, app):
+        """Test request bodies are decoded through the orjson provider."""
+        with app.test_request_context(
+            "/api/whitelist", method="POST", json={"resourceId": 1}
+        ):
+            with patch.object(
+                OrjsonProvider, "loads", return_value={"parsed": True}
+            ) as mock_loads:
+                assert request.get_json() == {"parsed": True}
+
+        mock_loads.assert_called_once()
+
+    def test_oversized_request_rejected_before_parsing(self, app, client, monkeypatch):
+        """Test MAX_CONTENT_LENGTH is enforced before the body is decoded."""
+        monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 16)
+
+        with patch.object(OrjsonProvider, "loads") as mock_loads:
+            response = client.post(
+                "/api/whitelist", json={"resourceId": 1, "ip": "192.168.1.100"}
+            )
+
+        assert response.status_code == 413
+        mock_loads.assert_not_called()
+
+    def test_non_ascii_emitted_as_utf8(self, app):
+        """Test non-ASCII resource names are emitted as raw UTF-8, not escaped."""
+        with app.app_context():
+            response = jsonify({"name": "Büro – 東京"})
+
+        assert response.get_data() == '{"name":"Büro – 東京"}'.encode()
+        assert response.get_json() == {"name": "Büro – 東京"}
+
+    def test_responses_compact_and_unsorted_in_debug(self, app, monkeypatch):
+        """Test debug mode neither pretty-prints nor sorts keys."""
+        monkeypatch.setitem(app.config, "DEBUG", True)
+
+        with app.app_context():
+            response = jsonify({"success": True, "data": {"b": 1, "a": 2}})
+
+        assert response.get_data() == b'{"success":true,"data":{"b":1,"a":2}}'
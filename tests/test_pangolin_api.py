@@ -1,11 +1,83 @@
 """Tests for PangolinAPI class."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, Mock, patch
 
+import orjson
 import pytest
+import requests
 
 from app.pangolin_api import PangolinAPI, PangolinAPIError
 
+# Built once and started around each test, instead of a decorator per test
+_SESSION_PATCHER = patch("app.pangolin_api.requests.Session")
+
+TEST_CONFIG = {
+    "PANGOLIN_API_URL": "https://test-api.com/v1",
+    "PANGOLIN_API_KEY": "test-key",
+    "PANGOLIN_ORG_ID": "test-org",
+}
+
+
+def _returning(value):
+    """Build a plain stub method that returns value without Mock bookkeeping."""
+    return lambda self, *args, **kwargs: value
+
+
+def _raising(exc):
+    """Build a plain stub method that raises exc."""
+
+    def stub(self, *args, **kwargs):
+        raise exc
+
+    return stub
+
+
+class FakeUpstream:
+    """In-memory Pangolin rules endpoints shared by several API clients."""
+
+    def __init__(self, *ips):
+        self.rules = {}
+        for ip in ips:
+            self._add({"match": "IP", "action": "ACCEPT", "value": ip})
+
+    def _add(self, rule):
+        rule_id = max(self.rules, default=0) + 1
+        self.rules[rule_id] = {**rule, "ruleId": rule_id}
+        return rule_id
+
+    def whitelisted(self):
+        return sorted(rule["value"] for rule in self.rules.values())
+
+    def request(self, method, endpoint, **kwargs):
+        if method == "GET":
+            return {"success": True, "data": {"rules": list(self.rules.values())}}
+        if method == "DELETE":
+            self.rules.pop(int(endpoint.rsplit("/", 1)[1]), None)
+            return {"success": True}
+        rule_id = self._add(orjson.loads(kwargs["data"]))
+        return {"success": True, "data": {"ruleId": rule_id}}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route every PangolinAPI instance's requests to one FakeUpstream."""
+    fake = FakeUpstream("1.1.1.1")
+    monkeypatch.setattr(
+        PangolinAPI,
+        "_make_request",
+        lambda self, method, endpoint, **kwargs: fake.request(
+            method, endpoint, **kwargs
+        ),
+    )
+    return fake
+
+
+@pytest.fixture
+def mock_session():
+    """Replace requests.Session so PangolinAPI builds a MagicMock session."""
+    yield _SESSION_PATCHER.start()
+    _SESSION_PATCHER.stop()
+
 
 class TestPangolinAPI:
     """Test cases for PangolinAPI class."""
@@ -25,6 +97,7 @@ class TestPangolinAPI:
         assert api.org_id == "test-org"
         assert "Authorization" in api.headers
         assert api.headers["Authorization"] == "Bearer test-key"
+        assert isinstance(api.session, requests.Session)
 
     def test_init_without_config(self, monkeypatch):
         """Test PangolinAPI initialization without config."""
@@ -37,16 +110,14 @@ class TestPangolinAPI:
         assert api.api_key == ""
         assert api.org_id == ""
 
-    @patch("app.pangolin_api.requests.Session")
     def test_make_request_success(self, mock_session):
         """Test successful API request."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {"success": True, "data": "test"}
-        mock_response.raise_for_status.return_value = None
+        mock_response.content = b'{"success": true, "data": "test"}'
+        mock_response.status_code = 200
 
-        mock_session_instance = MagicMock()
+        mock_session_instance = mock_session.return_value
         mock_session_instance.request.return_value = mock_response
-        mock_session.return_value = mock_session_instance
 
         api = PangolinAPI(
             {
@@ -57,46 +128,85 @@ class TestPangolinAPI:
         )
 
         result = api._make_request("GET", "test/endpoint")
+        api._make_request("GET", "test/endpoint")
 
         assert result == {"success": True, "data": "test"}
-        mock_session_instance.request.assert_called_once()
+        # Both requests go through the one pooled session built at init
+        assert mock_session.call_count == 1
+        assert mock_session_instance.request.call_count == 2
+
+    def test_make_request_builds_url(self, mock_session):
+        """Test request URLs are joined without duplicate slashes."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b'{"success": true}'
+
+        mock_session_instance = mock_session.return_value
+        mock_session_instance.request.return_value = mock_response
+
+        api = PangolinAPI(
+            {**TEST_CONFIG, "PANGOLIN_API_URL": "https://test-api.com/v1/"}
+        )
+        api._make_request("GET", "/resource/1/rules")
+
+        assert api.base_url == "https://test-api.com/v1"
+        assert (
+            mock_session_instance.request.call_args.args[1]
+            == "https://test-api.com/v1/resource/1/rules"
+        )
 
-    @patch("app.pangolin_api.requests.Session")
     def test_make_request_http_error(self, mock_session):
         """Test API request with HTTP error."""
-        from requests.exceptions import HTTPError
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_response.content = b'{"success": false, "message": "Resource not found"}'
+
+        mock_session_instance = mock_session.return_value
+        mock_session_instance.request.return_value = mock_response
 
+        api = PangolinAPI(TEST_CONFIG)
+
+        with pytest.raises(
+            PangolinAPIError, match="API request failed: Resource not found"
+        ) as exc_info:
+            api._make_request("GET", "test/endpoint")
+
+        assert exc_info.value.status_code == 404
+
+    def test_make_request_http_error_non_json(self, mock_session):
+        """Test API request with an HTTP error and a non-JSON body."""
         mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = HTTPError("404 Not Found")
+        mock_response.status_code = 502
+        mock_response.content = b"<html>Bad Gateway</html>"
 
-        mock_session_instance = MagicMock()
+        mock_session_instance = mock_session.return_value
         mock_session_instance.request.return_value = mock_response
-        mock_session.return_value = mock_session_instance
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
 
-        with pytest.raises(PangolinAPIError, match="API request failed"):
+        with pytest.raises(PangolinAPIError, match="HTTP 502") as exc_info:
             api._make_request("GET", "test/endpoint")
 
-    @patch("app.pangolin_api.requests.Session")
+        assert exc_info.value.status_code == 502
+
     def test_make_request_json_error(self, mock_session):
         """Test API request with JSON parsing error."""
         mock_response = MagicMock()
-        mock_response.json.side_effect = ValueError("Invalid JSON")
-        mock_response.raise_for_status.return_value = None
+        mock_response.content = b"<html>Bad Gateway</html>"
+        mock_response.status_code = 200
 
-        mock_session_instance = MagicMock()
+        mock_session_instance = mock_session.return_value
         mock_session_instance.request.return_value = mock_response
-        mock_session.return_value = mock_session_instance
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
 
         with pytest.raises(PangolinAPIError, match="Invalid JSON response"):
             api._make_request("GET", "test/endpoint")
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_get_resources_success(self, mock_make_request):
+    def test_get_resources_success(self, monkeypatch):
         """Test successful resources retrieval."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
         mock_make_request.return_value = {
             "success": True,
             "data": {"resources": [{"id": 1, "name": "Test"}]},
@@ -108,35 +218,38 @@ class TestPangolinAPI:
         assert result == [{"id": 1, "name": "Test"}]
         mock_make_request.assert_called_once_with("GET", "org/test-org/resources")
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_get_resources_failure(self, mock_make_request):
+    def test_get_resources_failure(self, monkeypatch):
         """Test resources retrieval failure."""
-        mock_make_request.return_value = {"success": False}
+        monkeypatch.setattr(
+            PangolinAPI, "_make_request", _returning({"success": False})
+        )
 
         api = PangolinAPI({"PANGOLIN_ORG_ID": "test-org"})
         result = api.get_resources()
 
         assert result is None
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_get_resources_api_error(self, mock_make_request):
+    def test_get_resources_api_error(self, monkeypatch):
         """Test resources retrieval with API error."""
-        mock_make_request.side_effect = PangolinAPIError("API Error")
+        monkeypatch.setattr(
+            PangolinAPI, "_make_request", _raising(PangolinAPIError("API Error"))
+        )
 
         api = PangolinAPI({"PANGOLIN_ORG_ID": "test-org"})
         result = api.get_resources()
 
         assert result is None
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_get_resource_rules_success(self, mock_make_request):
+    def test_get_resource_rules_success(self, monkeypatch):
         """Test successful resource rules retrieval."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
         mock_make_request.return_value = {
             "success": True,
             "data": {"rules": [{"id": 1, "action": "ACCEPT"}]},
         }
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.get_resource_rules(1)
 
         assert result == [{"id": 1, "action": "ACCEPT"}]
@@ -144,7 +257,7 @@ class TestPangolinAPI:
 
     def test_get_resource_rules_invalid_id(self):
         """Test resource rules with invalid ID."""
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
 
         # Should return None for invalid IDs (not raise ValueError)
         result = api.get_resource_rules(0)
@@ -153,102 +266,126 @@ class TestPangolinAPI:
         result = api.get_resource_rules(-1)
         assert result is None
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    def test_check_ip_whitelisted_true(self, mock_get_rules):
+    def test_check_ip_whitelisted_true(self, monkeypatch):
         """Test IP whitelist check - IP is whitelisted."""
-        mock_get_rules.return_value = [
-            {"match": "IP", "action": "ACCEPT", "value": "192.168.1.1", "enabled": True}
+        rules = [
+            {
+                "match": "IP",
+                "action": "ACCEPT",
+                "value": "192.168.1.1",
+                "enabled": True,
+            }
         ]
+        monkeypatch.setattr(PangolinAPI, "get_resource_rules", _returning(rules))
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.check_ip_whitelisted(1, "192.168.1.1")
 
         assert result is True
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    def test_check_ip_whitelisted_false(self, mock_get_rules):
+    def test_check_ip_whitelisted_false(self, monkeypatch):
         """Test IP whitelist check - IP is not whitelisted."""
-        mock_get_rules.return_value = [
-            {"match": "IP", "action": "ACCEPT", "value": "192.168.1.2", "enabled": True}
+        rules = [
+            {
+                "match": "IP",
+                "action": "ACCEPT",
+                "value": "192.168.1.2",
+                "enabled": True,
+            }
         ]
+        monkeypatch.setattr(PangolinAPI, "get_resource_rules", _returning(rules))
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.check_ip_whitelisted(1, "192.168.1.1")
 
         assert result is False
 
     def test_check_ip_whitelisted_invalid_ip(self):
         """Test IP whitelist check with invalid IP."""
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.check_ip_whitelisted(1, "invalid-ip")
 
         assert result is False
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    def test_get_next_priority(self, mock_get_rules):
+    def test_get_next_priority(self, monkeypatch):
         """Test next priority calculation."""
-        mock_get_rules.return_value = [
+        rules = [
             {"priority": 1},
             {"priority": 3},
             {"priority": 5},
         ]
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", _returning(rules))
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.get_next_priority(1)
 
         assert result == 6
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    def test_get_next_priority_no_rules(self, mock_get_rules):
+    def test_get_next_priority_no_rules(self, monkeypatch):
         """Test next priority calculation with no existing rules."""
-        mock_get_rules.return_value = []
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", _returning([]))
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.get_next_priority(1)
 
         assert result == 1
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_add_ip_to_whitelist_success(self, mock_make_request):
+    def test_add_ip_to_whitelist_success(self, monkeypatch):
         """Test successful IP whitelisting."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
         mock_make_request.return_value = {"success": True, "data": {"ruleId": 123}}
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.add_ip_to_whitelist(1, "192.168.1.1")
 
         assert result["success"] is True
         assert "ruleId" in result["rule"]
 
-    @patch.object(PangolinAPI, "_make_request")
-    def test_add_ip_to_whitelist_failure(self, mock_make_request):
+        method, endpoint = mock_make_request.call_args.args
+        assert (method, endpoint) == ("PUT", "resource/1/rule")
+        assert orjson.loads(mock_make_request.call_args.kwargs["data"]) == {
+            "action": "ACCEPT",
+            "match": "IP",
+            "value": "192.168.1.1",
+            "priority": 1,
+            "enabled": True,
+        }
+
+    def test_add_ip_to_whitelist_failure(self, monkeypatch):
         """Test IP whitelisting failure."""
-        mock_make_request.return_value = {
+        response = {
             "success": False,
             "message": "Failed to whitelist IP",
         }
+        monkeypatch.setattr(PangolinAPI, "_make_request", _returning(response))
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.add_ip_to_whitelist(1, "192.168.1.1")
 
         assert result["success"] is False
 
-
-    @patch.object(PangolinAPI, "_make_request")
-    def test_delete_rule_404_is_success(self, mock_make_request):
+    def test_delete_rule_404_is_success(self, monkeypatch):
         """Test that a 404 on delete is treated as a success."""
-        mock_make_request.side_effect = PangolinAPIError("Not Found", status_code=404)
+        monkeypatch.setattr(
+            PangolinAPI,
+            "_make_request",
+            _raising(PangolinAPIError("Not Found", status_code=404)),
+        )
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.delete_rule(1, 123)
 
         assert result["success"] is True
         assert "assumed deleted" in result["message"]
 
-    @patch.object(PangolinAPI, "get_resource_rules")
-    @patch.object(PangolinAPI, "delete_rule")
-    def test_delete_all_ip_rules_some_fail(self, mock_delete_rule, mock_get_rules):
+    def test_delete_all_ip_rules_some_fail(self, monkeypatch):
         """Test deleting all IP rules where some deletions fail."""
-        mock_get_rules.return_value = [
+        mock_delete_rule = Mock()
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_rule", mock_delete_rule)
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = [
             {"id": 1, "match": "IP", "action": "ACCEPT", "value": "1.1.1.1"},
             {"id": 2, "match": "IP", "action": "ACCEPT", "value": "2.2.2.2"},
         ]
@@ -257,9 +394,268 @@ class TestPangolinAPI:
             {"success": False, "message": "API Error"},
         ]
 
-        api = PangolinAPI()
+        api = PangolinAPI(TEST_CONFIG)
         result = api.delete_all_ip_rules(1)
 
         assert result["success"] is False
         assert result["deleted_count"] == 1
         assert len(result["failed_deletes"]) == 1
+
+    def test_delete_all_ip_rules_deletes_each_rule(self, monkeypatch):
+        """Test that every IP rule with an ID is deleted exactly once."""
+        mock_delete_rule = Mock()
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "delete_rule", mock_delete_rule)
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = [
+            {
+                "id": rule_id,
+                "match": "IP",
+                "action": "ACCEPT",
+                "value": f"10.0.0.{rule_id}",
+            }
+            for rule_id in range(1, 13)
+        ] + [{"match": "IP", "action": "ACCEPT", "value": "10.0.1.1"}]
+        mock_delete_rule.return_value = {"success": True}
+
+        api = PangolinAPI(TEST_CONFIG)
+        result = api.delete_all_ip_rules(1)
+
+        assert result["success"] is True
+        assert result["deleted_count"] == 12
+        deleted_ids = sorted(call.args[1] for call in mock_delete_rule.call_args_list)
+        assert deleted_ids == list(range(1, 13))
+
+    def test_get_resource_rules_cached(self, monkeypatch):
+        """Test that repeated rule lookups reuse the cached response."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
+        mock_make_request.return_value = {
+            "success": True,
+            "data": {"rules": [{"id": 1, "action": "ACCEPT"}]},
+        }
+
+        api = PangolinAPI(TEST_CONFIG)
+        assert api.get_resource_rules(1) == [{"id": 1, "action": "ACCEPT"}]
+        assert api.get_resource_rules(1) == [{"id": 1, "action": "ACCEPT"}]
+
+        mock_make_request.assert_called_once_with("GET", "resource/1/rules")
+
+    def test_add_ip_to_whitelist_fetches_rules_once(self, monkeypatch):
+        """Test that adding an IP fetches the rule list a single time."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
+        mock_make_request.return_value = {"success": True, "data": {"ruleId": 123}}
+
+        api = PangolinAPI(TEST_CONFIG)
+        api.add_ip_to_whitelist(1, "192.168.1.1")
+
+        methods = [call.args[0] for call in mock_make_request.call_args_list]
+        assert methods == ["GET", "PUT"]
+        assert 1 not in api._rules_cache
+
+    def test_analyze_rules(self):
+        """Test single-pass whitelist and priority analysis."""
+        rules = [
+            {"match": "IP", "action": "ACCEPT", "value": "1.1.1.1", "priority": 4},
+            {"match": "IP", "action": "ACCEPT", "value": "2.2.2.2", "enabled": False},
+            {"match": "PATH", "action": "DROP", "value": "/admin", "priority": 7},
+        ]
+
+        assert PangolinAPI._analyze_rules(rules, "1.1.1.1") == (True, 8)
+        assert PangolinAPI._analyze_rules(rules, "2.2.2.2") == (False, 8)
+        assert PangolinAPI._analyze_rules([], "1.1.1.1") == (False, 1)
+
+    def test_analyze_rules_null_priority(self):
+        """Test a rule with a null priority is treated as priority 0."""
+        rules = [
+            {"match": "IP", "action": "ACCEPT", "value": "1.1.1.1", "priority": None},
+            {"match": "IP", "action": "ACCEPT", "value": "2.2.2.2", "priority": 3},
+        ]
+
+        assert PangolinAPI._analyze_rules(rules, "1.1.1.1") == (True, 4)
+        assert PangolinAPI._analyze_rules(rules[:1], "3.3.3.3") == (False, 1)
+
+    def test_add_ip_to_whitelist_already_exists(self, monkeypatch):
+        """Test adding an IP that is already whitelisted skips the API write."""
+        mock_make_request = Mock()
+        mock_fetch_rules = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
+        monkeypatch.setattr(PangolinAPI, "_fetch_rules", mock_fetch_rules)
+        mock_fetch_rules.return_value = [
+            {"match": "IP", "action": "ACCEPT", "value": "192.168.1.1", "enabled": True}
+        ]
+
+        api = PangolinAPI(TEST_CONFIG)
+        result = api.add_ip_to_whitelist(1, "192.168.1.1")
+
+        assert result["success"] is True
+        assert result["alreadyExists"] is True
+        mock_make_request.assert_not_called()
+
+    def test_session_uses_configured_pool(self):
+        """Test that the session mounts an adapter with the configured pool size."""
+        api = PangolinAPI(
+            {
+                "PANGOLIN_API_URL": "https://test-api.com/v1",
+                "PANGOLIN_POOL_CONNECTIONS": 5,
+                "PANGOLIN_POOL_MAXSIZE": 15,
+            }
+        )
+
+        adapter = api.session.get_adapter("https://test-api.com/v1/resource/1/rules")
+
+        assert adapter._pool_connections == 5
+        assert adapter._pool_maxsize == 15
+        assert "PUT" not in adapter.max_retries.allowed_methods
+
+    def test_delete_workers_capped_by_pool_size(self):
+        """Test that concurrent deletes never exceed the connection pool size."""
+        api = PangolinAPI({"PANGOLIN_POOL_MAXSIZE": 4, "PANGOLIN_DELETE_WORKERS": 16})
+
+        assert api.max_delete_workers == 4
+
+    def test_check_ip_whitelisted_uses_cached_set(self, monkeypatch):
+        """Test whitelist checks on cached rules reuse the precomputed IP set."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
+        mock_make_request.return_value = {
+            "success": True,
+            "data": {
+                "rules": [
+                    {"match": "IP", "action": "ACCEPT", "value": "10.0.0.1"},
+                    {"match": "IP", "action": "DROP", "value": "10.0.0.2"},
+                    {
+                        "match": "IP",
+                        "action": "ACCEPT",
+                        "value": "10.0.0.3",
+                        "enabled": False,
+                    },
+                ]
+            },
+        }
+
+        api = PangolinAPI(TEST_CONFIG)
+
+        assert api.check_ip_whitelisted(1, "10.0.0.1") is True
+        assert api.check_ip_whitelisted(1, "10.0.0.2") is False
+        assert api.check_ip_whitelisted(1, "10.0.0.3") is False
+        assert api._rules_cache[1][2] == frozenset({"10.0.0.1"})
+        mock_make_request.assert_called_once()
+
+    def test_make_request_not_configured(self, mock_session):
+        """Test that requests fail fast without credentials."""
+        api = PangolinAPI({"PANGOLIN_API_URL": "https://test-api.com/v1"})
+
+        with pytest.raises(PangolinAPIError, match="not configured") as exc_info:
+            api._make_request("GET", "test/endpoint")
+
+        assert exc_info.value.status_code == 503
+        mock_session.return_value.request.assert_not_called()
+
+    def test_add_ip_to_whitelist_not_configured(self, monkeypatch):
+        """Test that write operations short-circuit without credentials."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
+        api = PangolinAPI({"PANGOLIN_API_URL": "https://test-api.com/v1"})
+
+        for result in (
+            api.add_ip_to_whitelist(1, "192.168.1.1"),
+            api.replace_ip_whitelist(1, "192.168.1.1"),
+            api.delete_rule(1, 123),
+            api.delete_all_ip_rules(1),
+        ):
+            assert result["success"] is False
+            assert result["error"] == "NOT_CONFIGURED"
+
+        mock_make_request.assert_not_called()
+
+    def test_client_has_no_instance_dict(self):
+        """Test that the client stores its state in slots."""
+        api = PangolinAPI(TEST_CONFIG)
+
+        assert not hasattr(api, "__dict__")
+        with pytest.raises(AttributeError):
+            api.unexpected = True
+
+    def test_warm_up(self, mock_session):
+        """Test that warm-up issues a HEAD and swallows connection errors."""
+        from requests.exceptions import ConnectionError
+
+        mock_session.return_value.head.side_effect = ConnectionError("refused")
+
+        api = PangolinAPI(TEST_CONFIG)
+        api.warm_up()
+
+        mock_session.return_value.head.assert_called_once_with(
+            "https://test-api.com/v1", timeout=5
+        )
+
+    def test_warm_up_not_configured(self, mock_session):
+        """Test that warm-up is skipped without credentials."""
+        PangolinAPI({}).warm_up()
+
+        mock_session.return_value.head.assert_not_called()
+
+    def test_get_resources_cached_until_rules_change(self, monkeypatch):
+        """Test resources are cached and dropped after a rule write."""
+        mock_make_request = Mock()
+        monkeypatch.setattr(PangolinAPI, "_make_request", mock_make_request)
+        mock_make_request.return_value = {
+            "success": True,
+            "data": {"resources": [{"id": 1, "name": "Test"}]},
+        }
+
+        api = PangolinAPI(TEST_CONFIG)
+        api.get_resources()
+        api.get_resources()
+        assert mock_make_request.call_count == 1
+
+        api.invalidate_rules_cache(1)
+        api.get_resources()
+        assert mock_make_request.call_count == 2
+
+    def test_fetch_racing_invalidation_not_cached(self, monkeypatch):
+        """Test a fetch that a write invalidates mid-flight is not stored."""
+        api = PangolinAPI(TEST_CONFIG)
+
+        def make_request(self, method, endpoint, **kwargs):
+            # Another thread's write lands while this GET is in flight
+            self.invalidate_rules_cache(1)
+            data = {"rules": []} if "rules" in endpoint else {"resources": []}
+            return {"success": True, "data": data}
+
+        monkeypatch.setattr(PangolinAPI, "_make_request", make_request)
+
+        assert api.get_resource_rules(1) == []
+        assert api.get_resources() == []
+        assert 1 not in api._rules_cache
+        assert api._resources_cache is None
+
+
+class TestPangolinAPIAcrossWorkers:
+    """Write paths must not act on rules cached before another worker's write."""
+
+    def test_add_after_other_worker_deleted_rules(self, upstream):
+        """Test a cached whitelist entry does not mask its upstream deletion."""
+        worker_a, worker_b = PangolinAPI(TEST_CONFIG), PangolinAPI(TEST_CONFIG)
+        assert worker_a.check_ip_whitelisted(1, "1.1.1.1") is True
+
+        assert worker_b.delete_all_ip_rules(1)["deleted_count"] == 1
+        result = worker_a.add_ip_to_whitelist(1, "1.1.1.1")
+
+        assert result["success"] is True
+        assert "alreadyExists" not in result
+        assert upstream.whitelisted() == ["1.1.1.1"]
+
+    def test_replace_after_other_worker_added_rule(self, upstream):
+        """Test replace removes IP rules added since this worker cached them."""
+        worker_a, worker_b = PangolinAPI(TEST_CONFIG), PangolinAPI(TEST_CONFIG)
+        assert worker_a.get_resource_rules(1)
+
+        worker_b.add_ip_to_whitelist(1, "2.2.2.2")
+        result = worker_a.replace_ip_whitelist(1, "3.3.3.3")
+
+        assert result["success"] is True
+        assert result["deleted_count"] == 2
+        assert upstream.whitelisted() == ["3.3.3.3"]
@@ -1,7 +1,12 @@
 """Tests for API routes."""
 
+import gzip
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
+
+# Shared read-only request bodies
+VALID_WHITELIST_BODY = {"resourceId": 1, "ip": "192.168.1.1"}
+INVALID_IP_BODY = {"resourceId": 1, "ip": "invalid-ip"}
 
 
 def test_index_route(client):
@@ -15,7 +20,7 @@ def test_client_ip_route_remote_addr(client):
     """Test client IP detection using remote_addr."""
     response = client.get("/api/client-ip")
     assert response.status_code == 200
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is True
     assert data["ip"] == "127.0.0.1"
 
@@ -25,141 +30,103 @@ def test_client_ip_route_x_forwarded_for(client):
     headers = {"X-Forwarded-For": "1.2.3.4, 5.6.7.8"}
     response = client.get("/api/client-ip", headers=headers)
     assert response.status_code == 200
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is True
     assert data["ip"] == "1.2.3.4"
 
 
-@patch("app.routes.PangolinAPI")
-def test_resources_route_success(mock_pangolin_api_class, client):
-    """Test successful resources retrieval."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
+@patch("app.routes.get_real_ip", return_value=None)
+def test_client_ip_route_no_ip(mock_get_real_ip, client):
+    """Test client IP route when no address can be determined."""
+    response = client.get("/api/client-ip")
+    assert response.status_code == 400
+
+    data = response.get_json()
+    assert data["success"] is False
+    assert "error" in data
 
+
+def test_resources_route_success(client, mock_pangolin):
+    """Test successful resources retrieval."""
     mock_resources = [{"resourceId": 1, "name": "Test Resource", "whitelist": True}]
-    mock_api.get_resources.return_value = mock_resources
+    mock_pangolin.get_resources.return_value = mock_resources
 
     response = client.get("/api/resources")
     assert response.status_code == 200
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is True
     assert data["data"] == mock_resources
 
 
-@patch("app.routes.PangolinAPI")
-def test_resources_route_failure(mock_pangolin_api_class, client):
+def test_resources_route_failure(client, mock_pangolin):
     """Test resources route when API fails."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
-
-    mock_api.get_resources.return_value = None
+    mock_pangolin.get_resources.return_value = None
 
     response = client.get("/api/resources")
     assert response.status_code == 500
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is False
     assert "error" in data
 
 
-@patch("app.routes.PangolinAPI")
-def test_check_whitelist_invalid_data(mock_pangolin_api_class, client):
+def test_check_whitelist_invalid_data(client, mock_pangolin):
     """Test whitelist check with invalid data."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
-
-    response = client.post(
-        "/api/check-whitelist", data=json.dumps({}), content_type="application/json"
-    )
+    response = client.post("/api/check-whitelist", json={})
     assert response.status_code == 400
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is False
 
 
-@patch("app.routes.PangolinAPI")
-def test_whitelist_invalid_ip(mock_pangolin_api_class, client):
+def test_whitelist_invalid_ip(client, mock_pangolin):
     """Test whitelist endpoint with invalid IP."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
-
-    response = client.post(
-        "/api/whitelist",
-        data=json.dumps({"resourceId": 1, "ip": "invalid-ip"}),
-        content_type="application/json",
-    )
+    response = client.post("/api/whitelist", json=INVALID_IP_BODY)
     assert response.status_code == 400
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is False
     assert "error" in data
 
 
-@patch("app.routes.PangolinAPI")
-def test_check_whitelist_success(mock_pangolin_api_class, client):
+def test_check_whitelist_success(client, mock_pangolin):
     """Test successful whitelist check."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
-
-    mock_api.check_ip_whitelisted.return_value = True
+    mock_pangolin.check_ip_whitelisted.return_value = True
 
-    response = client.post(
-        "/api/check-whitelist",
-        data=json.dumps({"resourceId": 1, "ip": "192.168.1.1"}),
-        content_type="application/json",
-    )
+    response = client.post("/api/check-whitelist", json=VALID_WHITELIST_BODY)
     assert response.status_code == 200
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is True
     assert data["isWhitelisted"] is True
 
 
-@patch("app.routes.PangolinAPI")
-def test_whitelist_success(mock_pangolin_api_class, client):
+def test_whitelist_success(client, mock_pangolin):
     """Test successful IP whitelisting."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
-
-    mock_api.add_ip_to_whitelist.return_value = {
+    mock_pangolin.add_ip_to_whitelist.return_value = {
         "success": True,
         "message": "IP successfully whitelisted",
         "rule": {"ruleId": 123},
     }
 
-    response = client.post(
-        "/api/whitelist",
-        data=json.dumps({"resourceId": 1, "ip": "192.168.1.1"}),
-        content_type="application/json",
-    )
+    response = client.post("/api/whitelist", json=VALID_WHITELIST_BODY)
     assert response.status_code == 200
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is True
     assert "ruleId" in data["rule"]
 
 
-@patch("app.routes.PangolinAPI")
-def test_resource_rules_success(mock_pangolin_api_class, client):
+def test_resource_rules_success(client, mock_pangolin):
     """Test successful resource rules retrieval."""
-    # Setup mock API instance
-    mock_api = MagicMock()
-    mock_pangolin_api_class.return_value = mock_api
-
     mock_rules = [{"ruleId": 1, "action": "ACCEPT", "value": "192.168.1.1"}]
-    mock_api.get_resource_rules.return_value = mock_rules
+    mock_pangolin.get_resource_rules.return_value = mock_rules
 
     response = client.get("/api/resource/1/rules")
     assert response.status_code == 200
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is True
     assert data["data"] == mock_rules
 
@@ -169,6 +136,41 @@ def test_resource_rules_invalid_id(client):
     response = client.get("/api/resource/0/rules")
     assert response.status_code == 400
 
-    data = json.loads(response.data)
+    data = response.get_json()
     assert data["success"] is False
     assert "error" in data
+
+
+def test_pangolin_client_shared_across_requests(app):
+    """Test that the app exposes a single shared PangolinAPI client."""
+    from app.pangolin_api import PangolinAPI, get_pangolin
+
+    with app.app_context():
+        first = get_pangolin()
+        second = get_pangolin()
+
+    assert isinstance(first, PangolinAPI)
+    assert first is second
+
+
+def test_resources_route_compressed(client, mock_pangolin):
+    """Test large JSON responses are compressed when the client accepts it."""
+    mock_pangolin.get_resources.return_value = [
+        {"resourceId": i, "name": f"Resource {i}", "whitelist": True}
+        for i in range(100)
+    ]
+
+    response = client.get("/api/resources", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+
+    data = json.loads(gzip.decompress(response.data))
+    assert len(data["data"]) == 100
+
+
+def test_small_responses_not_compressed(client):
+    """Test responses under COMPRESS_MIN_SIZE are sent as-is."""
+    response = client.get("/api/client-ip", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["success"] is True
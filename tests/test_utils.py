@@ -1,35 +1,41 @@
 """Tests for utility functions."""
 
-from app.utils import validate_ip_address
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import _is_ip_literal, get_real_ip, validate_ip_address
+
+# Each address is asserted once; other tests only add cases not listed here
+VALID_IPV4 = (
+    "192.168.1.1",  # Private
+    "10.0.0.1",  # Private
+    "172.16.0.1",  # Private
+    "127.0.0.1",  # Loopback
+    "0.0.0.0",  # Lower bound
+    "255.255.255.255",  # Upper bound / broadcast
+)
 
 
 class TestUtils:
     """Test cases for utility functions."""
 
-    def test_validate_ip_address_valid_ipv4(self):
+    @pytest.mark.parametrize("ip", VALID_IPV4)
+    def test_validate_ip_address_valid_ipv4(self, ip):
         """Test valid IPv4 addresses."""
-        valid_ips = [
-            "192.168.1.1",
-            "10.0.0.1",
-            "172.16.0.1",
-            "127.0.0.1",
-            "0.0.0.0",
-            "255.255.255.255",
-        ]
-
-        for ip in valid_ips:
-            assert validate_ip_address(ip) is True, f"IP {ip} should be valid"
-
-    def test_validate_ip_address_valid_ipv6(self):
-        """Test valid IPv6 addresses."""
-        valid_ips = ["::1", "2001:db8::1", "fe80::1", "::ffff:192.168.1.1"]
+        assert validate_ip_address(ip) is True
 
-        for ip in valid_ips:
-            assert validate_ip_address(ip) is True, f"IP {ip} should be valid"
+    @pytest.mark.parametrize(
+        "ip", ["::1", "2001:db8::1", "fe80::1", "::ffff:192.168.1.1"]
+    )
+    def test_validate_ip_address_valid_ipv6(self, ip):
+        """Test valid IPv6 addresses."""
+        assert validate_ip_address(ip) is True
 
-    def test_validate_ip_address_invalid(self):
-        """Test invalid IP addresses."""
-        invalid_ips = [
+    @pytest.mark.parametrize(
+        "ip",
+        [
             "invalid-ip",
             "192.168.1.256",  # Invalid octet
             "192.168.1",  # Incomplete
@@ -46,38 +52,95 @@ class TestUtils:
             123,  # Integer
             "localhost",  # Hostname
             "example.com",  # Domain name
-        ]
-
-        for ip in invalid_ips:
-            assert validate_ip_address(ip) is False, f"IP {ip} should be invalid"
-
-    def test_validate_ip_address_edge_cases(self):
+        ],
+    )
+    def test_validate_ip_address_invalid(self, ip):
+        """Test invalid IP addresses."""
+        assert validate_ip_address(ip) is False
+
+    @pytest.mark.parametrize(
+        "ip",
+        [
+            "127.0.0.0",  # Loopback network address
+            "127.255.255.255",  # Loopback broadcast
+            "192.168.1.255",  # Subnet broadcast
+        ],
+    )
+    def test_validate_ip_address_edge_cases(self, ip):
         """Test edge cases for IP validation."""
-        # Private IP ranges
-        private_ips = ["10.0.0.1", "172.16.0.1", "192.168.1.1"]
-
-        for ip in private_ips:
-            assert validate_ip_address(ip) is True, f"Private IP {ip} should be valid"
-
-        # Loopback addresses
-        loopback_ips = ["127.0.0.1", "127.0.0.0", "127.255.255.255"]
-
-        for ip in loopback_ips:
-            assert validate_ip_address(ip) is True, f"Loopback IP {ip} should be valid"
-
-        # Broadcast addresses
-        broadcast_ips = ["255.255.255.255", "192.168.1.255"]
-
-        for ip in broadcast_ips:
-            assert validate_ip_address(ip) is True, f"Broadcast IP {ip} should be valid"
-
-    def test_validate_ip_address_boundary_values(self):
-        """Test boundary values for IP validation."""
-        # Valid boundary values
-        assert validate_ip_address("0.0.0.0") is True
-        assert validate_ip_address("255.255.255.255") is True
-
-        # Invalid boundary values
-        assert validate_ip_address("0.0.0.256") is False
-        assert validate_ip_address("256.0.0.0") is False
-        assert validate_ip_address("-1.0.0.0") is False
+        assert validate_ip_address(ip) is True
+
+    @pytest.mark.parametrize("ip", ["0.0.0.256", "256.0.0.0", "-1.0.0.0"])
+    def test_validate_ip_address_boundary_values(self, ip):
+        """Test out-of-range octets just past the valid boundaries."""
+        assert validate_ip_address(ip) is False
+
+    def test_validate_ip_address_unhashable(self):
+        """Test that non-string JSON values are rejected, not cached."""
+        assert validate_ip_address(["192.168.1.1"]) is False
+        assert validate_ip_address({"ip": "192.168.1.1"}) is False
+
+    def test_validate_ip_address_mapped_and_compressed(self):
+        """Test IPv6 forms that embed IPv4 or compress zero groups."""
+        assert validate_ip_address("::") is True
+        assert validate_ip_address("fe80::1:2:3:4") is True
+        assert validate_ip_address("::ffff:1.2.3.256") is False
+        assert validate_ip_address("1::2::3") is False
+
+    def test_validate_ip_address_cached(self):
+        """Test that repeated validation of the same IP hits the cache."""
+        _is_ip_literal.cache_clear()
+
+        assert validate_ip_address("10.0.0.1") is True
+        assert validate_ip_address("10.0.0.1") is True
+
+        assert _is_ip_literal.cache_info().hits == 1
+
+    def test_validate_ip_address_prefilter_rejects_garbage(self):
+        """Test that garbage input is rejected before reaching inet_pton."""
+        _is_ip_literal.cache_clear()
+
+        with patch("app.utils.socket.inet_pton") as mock_inet_pton:
+            assert validate_ip_address("not-an-ip") is False
+            assert validate_ip_address("1.2.3.4\n") is False
+            assert validate_ip_address("a" * 46) is False
+
+        mock_inet_pton.assert_not_called()
+        assert _is_ip_literal.cache_info().currsize == 0
+
+    def test_validate_ip_address_single_parse(self):
+        """Test each address is parsed once, for the family it can belong to."""
+        _is_ip_literal.cache_clear()
+
+        with patch(
+            "app.utils.socket.inet_pton", wraps=socket.inet_pton
+        ) as mock_inet_pton:
+            assert validate_ip_address("2001:db8::1") is True
+            assert validate_ip_address("192.168.1.256") is False
+
+        families = [call.args[0] for call in mock_inet_pton.call_args_list]
+        assert families == [socket.AF_INET6, socket.AF_INET]
+
+    def test_get_real_ip_depth(self, app):
+        """Test selecting X-Forwarded-For entries by depth."""
+        headers = {"X-Forwarded-For": "1.1.1.1, 2.2.2.2 ,3.3.3.3"}
+        with app.test_request_context(headers=headers) as ctx:
+            assert get_real_ip(ctx.request) == "1.1.1.1"
+            assert get_real_ip(ctx.request, depth=1) == "2.2.2.2"
+            assert get_real_ip(ctx.request, depth=2) == "3.3.3.3"
+            # Deeper than the chain falls back to the first entry
+            assert get_real_ip(ctx.request, depth=3) == "1.1.1.1"
+
+    def test_get_real_ip_empty_forwarded_entry(self, app):
+        """Test an empty X-Forwarded-For entry falls back to remote_addr."""
+        headers = {"X-Forwarded-For": " , 1.2.3.4,"}
+        environ = {"REMOTE_ADDR": "10.0.0.9"}
+        with app.test_request_context(headers=headers, environ_base=environ) as ctx:
+            assert get_real_ip(ctx.request) == "10.0.0.9"
+            assert get_real_ip(ctx.request, depth=1) == "1.2.3.4"
+            assert get_real_ip(ctx.request, depth=2) == "10.0.0.9"
+
+    def test_get_real_ip_without_forwarded_header(self, app):
+        """Test falling back to remote_addr without X-Forwarded-For."""
+        with app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.9"}) as ctx:
+            assert get_real_ip(ctx.request, depth=1) == "10.0.0.9"
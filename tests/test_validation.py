@@ -0,0 +1,104 @@
+"""Tests for request payload validation."""
+
+from flask import jsonify
+
+from app.validation import error_response, parse_whitelist_payload
+
+
+class TestErrorResponse:
+    """Test cases for error_response."""
+
+    def test_matches_jsonify_output(self, app):
+        """Test the pre-encoded body matches what jsonify would produce."""
+        with app.app_context():
+            expected = jsonify({"success": False, "error": "Invalid resource ID"})
+        response, status = error_response("Invalid resource ID", 400)
+
+        assert status == 400
+        assert response.mimetype == "application/json"
+        assert response.get_data() == expected.get_data()
+
+    def test_fresh_response_per_call(self):
+        """Test each call gets its own response around a shared body."""
+        first, _ = error_response("Invalid rule ID", 400)
+        second, _ = error_response("Invalid rule ID", 400)
+
+        assert first is not second
+        assert first.get_data() == second.get_data()
+
+
+class TestParseWhitelistPayload:
+    """Test cases for parse_whitelist_payload."""
+
+    def test_valid_payload(self):
+        """Test a valid payload yields the coerced resource ID and IP."""
+        assert parse_whitelist_payload({"resourceId": "5", "ip": "10.0.0.1"}) == (
+            5,
+            "10.0.0.1",
+        )
+
+    def test_missing_or_non_object_payload(self):
+        """Test empty and non-object bodies are rejected."""
+        assert parse_whitelist_payload(None) == "No JSON data provided"
+        assert parse_whitelist_payload({}) == "No JSON data provided"
+        assert parse_whitelist_payload(["10.0.0.1"]) == "No JSON data provided"
+
+    def test_invalid_resource_id(self):
+        """Test missing, non-positive and malformed resource IDs."""
+        assert parse_whitelist_payload({"ip": "10.0.0.1"}) == "Invalid resource ID"
+        assert (
+            parse_whitelist_payload({"resourceId": 0, "ip": "10.0.0.1"})
+            == "Invalid resource ID"
+        )
+        assert (
+            parse_whitelist_payload({"resourceId": "abc", "ip": "10.0.0.1"})
+            == "Invalid resource ID format"
+        )
+        assert (
+            parse_whitelist_payload({"resourceId": [1], "ip": "10.0.0.1"})
+            == "Invalid resource ID format"
+        )
+
+    def test_invalid_ip(self):
+        """Test missing and malformed IP addresses."""
+        assert parse_whitelist_payload({"resourceId": 1}) == "Invalid IP address"
+        assert (
+            parse_whitelist_payload({"resourceId": 1, "ip": "999.1.1.1"})
+            == "Invalid IP address"
+        )
+
+
+class TestRequireWhitelistPayload:
+    """Test cases for the require_whitelist_payload decorator on routes."""
+
+    def test_wrong_content_type_is_bad_request(self, client, mock_pangolin):
+        """Test a non-JSON body is rejected before reaching the API."""
+        response = client.post(
+            "/api/whitelist",
+            data="resourceId=1&ip=10.0.0.1",
+            content_type="application/x-www-form-urlencoded",
+        )
+
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "No JSON data provided"
+        assert mock_pangolin.mock_calls == []
+
+    def test_malformed_json_is_bad_request(self, client, mock_pangolin):
+        """Test a malformed JSON body is rejected with a 400."""
+        response = client.post(
+            "/api/check-whitelist", data="{not json", content_type="application/json"
+        )
+
+        assert response.status_code == 400
+        assert mock_pangolin.mock_calls == []
+
+    def test_view_receives_parsed_values(self, client, mock_pangolin):
+        """Test the view is called with the coerced resource ID and IP."""
+        mock_pangolin.check_ip_whitelisted.return_value = True
+
+        response = client.post(
+            "/api/check-whitelist", json={"resourceId": "3", "ip": "10.0.0.1"}
+        )
+
+        assert response.status_code == 200
+        mock_pangolin.check_ip_whitelisted.assert_called_once_with(3, "10.0.0.1")